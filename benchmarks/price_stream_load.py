@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Price stream load test: N browser-like clients either polling
+/api/market-data-new/<symbol> every 2 s (before) or opening one
+/api/stream/prices connection each (after). Like price-stream.js, a
+client the server turns away with 503 polls instead.
+
+Runs the app under the deployed gunicorn command (one gthread worker,
+--threads 32, throwaway SQLite database) and reports, for the worker
+process, HTTP requests per second, CPU use, price updates delivered per
+client, how many clients got a stream, and the latency of a page load
+made while all of them are connected. Server CPU is read from /proc, so
+this needs Linux. Usage:
+    python benchmarks/price_stream_load.py [clients] [seconds]
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYMBOL = 'EURUSD'
+POLL_INTERVAL = 2.0  # what the front end used to do
+PROBE_INTERVAL = 0.5
+PROBE_TIMEOUT = 30
+
+# As deployed in .replit
+GUNICORN = ['gunicorn', '--threads', '32', 'main:app']
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def worker_pid(master_pid):
+    """The gunicorn worker process forked by the master"""
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        children = f.read().split()
+    return int(children[0]) if children else master_pid
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+def start_server(port, db_path):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', SESSION_SECRET='bench',
+               TWELVE_DATA_API_KEY='', QUOTE_REFRESH_INTERVAL='0', EXPIRY_SCHEDULER_ENABLED='0')
+    proc = subprocess.Popen([sys.executable, '-m'] + GUNICORN + ['--bind', f'127.0.0.1:{port}'],
+                            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/market-data-new/{SYMBOL}', timeout=1)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError('server did not start')
+
+def poll_client(base, stop, counts):
+    session = requests.Session()
+    while not stop.is_set():
+        try:
+            session.get(f'{base}/api/market-data-new/{SYMBOL}', timeout=10).json()
+        except requests.RequestException:
+            return  # server shut down at the end of the run
+        counts['requests'] += 1
+        counts['updates'] += 1
+        stop.wait(POLL_INTERVAL)
+
+def stream_client(base, stop, counts):
+    try:
+        with requests.get(f'{base}/api/stream/prices', params={'symbols': SYMBOL}, stream=True, timeout=30) as response:
+            counts['requests'] += 1
+            if response.status_code == 503:
+                counts['refused'] = 1
+                poll_client(base, stop, counts)
+                return
+            counts['streaming'] = 1
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('data:'):
+                    counts['updates'] += 1
+                if stop.is_set():
+                    break
+    except requests.RequestException:
+        pass  # server shut down at the end of the run
+
+def page_probe(base, stop, latencies):
+    """Load the login page over and over, as a new visitor would"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            requests.get(f'{base}/login', timeout=PROBE_TIMEOUT)
+            latencies.append(time.perf_counter() - started)
+        except requests.RequestException:
+            latencies.append(float('inf'))
+        stop.wait(PROBE_INTERVAL)
+
+def run(mode, base, pid, clients, seconds):
+    target = poll_client if mode == 'poll' else stream_client
+    stop = threading.Event()
+    counts = [{'requests': 0, 'updates': 0, 'streaming': 0, 'refused': 0} for _ in range(clients)]
+    threads = [threading.Thread(target=target, args=(base, stop, c), daemon=True) for c in counts]
+
+    for thread in threads:
+        thread.start()
+    time.sleep(2.0)  # let every client connect
+
+    latencies = []
+    probe = threading.Thread(target=page_probe, args=(base, stop, latencies), daemon=True)
+    start_counts = [dict(c) for c in counts]
+    cpu_before, started = cpu_seconds(pid), time.time()
+    probe.start()
+    time.sleep(seconds)
+    cpu_used, elapsed = cpu_seconds(pid) - cpu_before, time.time() - started
+    stop.set()
+
+    requests_made = sum(c['requests'] - s['requests'] for c, s in zip(counts, start_counts))
+    updates = sum(c['updates'] - s['updates'] for c, s in zip(counts, start_counts))
+    latencies.sort()
+    return {
+        'requests_per_s': requests_made / elapsed,
+        'cpu_percent': 100 * cpu_used / elapsed,
+        'updates_per_client_s': updates / elapsed / clients,
+        'streaming': sum(c['streaming'] for c in counts),
+        'refused': sum(c['refused'] for c in counts),
+        'page_p50_ms': 1000 * latencies[len(latencies) // 2] if latencies else float('inf'),
+        'page_max_ms': 1000 * latencies[-1] if latencies else float('inf')
+    }
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"{clients} clients, {seconds:.0f} s per mode, symbol {SYMBOL}")
+    for mode, label in (('poll', f'polling every {POLL_INTERVAL:.0f}s'), ('stream', 'SSE stream')):
+        port = free_port()
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = start_server(port, os.path.join(tmp, 'bench.db'))
+            try:
+                result = run(mode, f'http://127.0.0.1:{port}', worker_pid(proc.pid), clients, seconds)
+            finally:
+                proc.kill()
+                proc.wait()
+        print(f"{label:<20} server requests/s {result['requests_per_s']:7.1f}   "
+              f"server CPU {result['cpu_percent']:6.1f}%   "
+              f"price updates/client/s {result['updates_per_client_s']:5.2f}")
+        print(f"{'':<20} streams {result['streaming']:4d}   refused (polling) {result['refused']:4d}   "
+              f"page load p50 {result['page_p50_ms']:7.1f} ms   max {result['page_max_ms']:7.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Settlement throughput benchmark: trades settled per second by the old
+per-trade loop (one price lookup, user query and ORM flush per trade, as
+trade_processor.py used to do), the batched settlement engine and its
+set-based SQL mode
+
+Each run seeds a throwaway SQLite database with users, wallets and trades
+that expired over the last few minutes across every listed asset, and
+checks that both engine modes write identical trades, wallets and
+transactions. The per-trade loop is skipped above LEGACY_MAX_TRADES. Usage:
+    python benchmarks/settlement_bench.py [trades ...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+TMP_DIR = tempfile.mkdtemp(prefix='settlement-bench-')
+os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}",
+                  SESSION_SECRET='bench', QUOTE_REFRESH_INTERVAL='0')
+
+from sqlalchemy import insert
+
+from app import app, db
+from models import User, Wallet, Trade, Transaction
+from settlement import settle_expired_trades, settle_expired_trades_in_sql, WON
+from symbols import LISTED_SYMBOLS
+from utils import get_asset_price_at
+
+USERS = 500
+LEGACY_MAX_TRADES = 20000
+
+def seed(trades, now):
+    db.drop_all()
+    db.create_all()
+    rng = random.Random(7)
+    controls = ['normal'] * 18 + ['always_lose', 'always_profit']
+    db.session.execute(insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x',
+         'trade_control': rng.choice(controls)}
+        for i in range(1, USERS + 1)
+    ])
+    db.session.execute(insert(Wallet), [
+        {'user_id': i, 'balance': Decimal('1000.00'), 'demo_balance': Decimal('10000.00')}
+        for i in range(1, USERS + 1)
+    ])
+    db.session.execute(insert(Trade), [
+        {'user_id': rng.randint(1, USERS), 'asset': rng.choice(LISTED_SYMBOLS),
+         'trade_type': rng.choice(('call', 'put')), 'amount': Decimal(rng.randint(10, 500)),
+         'entry_price': Decimal('1.00000'), 'payout_percentage': Decimal('85.00'),
+         'expiry_time': now - timedelta(seconds=rng.randint(1, 600)),
+         'status': 'active', 'is_demo': rng.random() < 0.5}
+        for _ in range(trades)
+    ])
+    db.session.commit()
+
+def legacy_settle():
+    """The per-trade loop settlement used before the engine"""
+    now = datetime.utcnow()
+    expired = Trade.query.filter(Trade.status == 'active', Trade.expiry_time <= now).all()
+    for trade in expired:
+        user = db.session.get(User, trade.user_id)
+        exit_price = get_asset_price_at(trade.asset, trade.expiry_time)
+        if user.trade_control == 'always_lose':
+            won = False
+        elif user.trade_control == 'always_profit':
+            won = True
+        elif trade.trade_type == 'call':
+            won = Decimal(str(exit_price)) > trade.entry_price
+        else:
+            won = Decimal(str(exit_price)) < trade.entry_price
+        trade.exit_price = exit_price
+        trade.closed_at = now
+        if won:
+            trade.status = 'won'
+            trade.profit_loss = trade.amount * trade.payout_percentage / 100
+            payout = trade.amount + trade.profit_loss
+            wallet = Wallet.query.filter_by(user_id=trade.user_id).first()
+            if trade.is_demo:
+                wallet.demo_balance += payout
+            else:
+                wallet.balance += payout
+            db.session.add(Transaction(user_id=trade.user_id, transaction_type='trade_win', amount=payout,
+                                       description=f'Won trade: {trade.asset} {trade.trade_type}'))
+        else:
+            trade.status = 'lost'
+            trade.profit_loss = -trade.amount
+        db.session.flush()
+    db.session.commit()
+    return len(expired)
+
+def engine_settle():
+    return len(settle_expired_trades())
+
+def check_ledger():
+    """Every credited payout matches a trade_win transaction"""
+    credited = db.session.query(db.func.sum(Wallet.balance + Wallet.demo_balance)).scalar() \
+        - USERS * Decimal('11000.00')
+    recorded = db.session.query(db.func.sum(Transaction.amount)).scalar() or 0
+    won = Trade.query.filter_by(status=WON).count()
+    return abs(credited - recorded) < Decimal('0.01'), won
+
+def snapshot():
+    """Everything settlement writes, for comparing modes"""
+    return (
+        db.session.query(Trade.id, Trade.status, Trade.exit_price, Trade.profit_loss).order_by(Trade.id).all(),
+        db.session.query(Wallet.user_id, Wallet.balance, Wallet.demo_balance).order_by(Wallet.user_id).all(),
+        db.session.query(Transaction.user_id, Transaction.amount, Transaction.description)
+        .order_by(Transaction.user_id, Transaction.amount, Transaction.description).all()
+    )
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    modes = (('per-trade loop', legacy_settle), ('engine, batch', engine_settle),
+             ('engine, sql', settle_expired_trades_in_sql))
+    print(f"{len(LISTED_SYMBOLS)} assets, {USERS} users, SQLite")
+    with app.app_context():
+        for size in sizes:
+            # Same expiries for every mode, so they look up the same exit prices
+            now = datetime.utcnow()
+            snapshots = {}
+            for label, settle in modes:
+                if settle is legacy_settle and size > LEGACY_MAX_TRADES:
+                    continue
+                seed(size, now)
+                started = time.perf_counter()
+                settled = settle()
+                elapsed = time.perf_counter() - started
+                consistent, won = check_ledger()
+                snapshots[label] = snapshot()
+                print(f"{size:>7} trades  {label:<15} {elapsed:7.3f} s  {settled / elapsed:10,.0f} trades/s  "
+                      f"won {won:>6}  ledger {'ok' if consistent else 'MISMATCH'}")
+            same = snapshots['engine, batch'] == snapshots['engine, sql']
+            print(f"{'':>7}         batch and sql modes wrote {'identical' if same else 'DIFFERENT'} rows")
+
+if __name__ == '__main__':
+    main()
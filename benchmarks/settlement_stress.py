@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Settlement stress test: N worker processes settle the same expiring trades
+at once and every trade must be credited exactly once
+
+Half the workers drain due trades in claimed batches, alternating between
+the batch and SQL modes; the other half behave like browsers calling
+/api/process_expired_trade for one trade at a time. Trades keep expiring
+while they run. Afterwards each wallet must equal its starting balance
+plus exactly one payout per won trade, with one trade_win transaction per
+win. Uses a throwaway SQLite database unless a DATABASE_URL is given.
+Exits non-zero on any discrepancy. Usage:
+    python benchmarks/settlement_stress.py [workers] [trades] [database_url]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+USERS = 200
+BALANCE = Decimal('1000.00')
+DEMO_BALANCE = Decimal('10000.00')
+EXPIRY_SPREAD = (-30, 5)  # seconds around the start of the run
+BATCH_SIZE = 200
+
+def app_context(database_url):
+    """Import the app against database_url (each process gets its own engine)"""
+    os.environ.update(DATABASE_URL=database_url, SESSION_SECRET='stress', QUOTE_REFRESH_INTERVAL='0')
+    sys.path.insert(0, REPO_ROOT)
+    import logging
+    logging.disable(logging.INFO)
+    from app import app
+    return app.app_context()
+
+def seed(trades):
+    from sqlalchemy import insert
+    from app import db
+    from models import User, Wallet, Trade
+    from symbols import LISTED_SYMBOLS
+
+    db.drop_all()
+    db.create_all()
+    rng = random.Random(11)
+    controls = ['normal'] * 18 + ['always_lose', 'always_profit']
+    db.session.execute(insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x',
+         'trade_control': rng.choice(controls)}
+        for i in range(1, USERS + 1)
+    ])
+    db.session.execute(insert(Wallet), [
+        {'user_id': i, 'balance': BALANCE, 'demo_balance': DEMO_BALANCE} for i in range(1, USERS + 1)
+    ])
+    now = datetime.utcnow()
+    db.session.execute(insert(Trade), [
+        {'user_id': rng.randint(1, USERS), 'asset': rng.choice(LISTED_SYMBOLS),
+         'trade_type': rng.choice(('call', 'put')), 'amount': Decimal(rng.randint(10, 500)),
+         'entry_price': Decimal('1.00000'), 'payout_percentage': Decimal('85.00'),
+         'expiry_time': now + timedelta(seconds=rng.uniform(*EXPIRY_SPREAD)),
+         'status': 'active', 'is_demo': rng.random() < 0.5}
+        for _ in range(trades)
+    ])
+    db.session.commit()
+
+def worker(database_url, index, results):
+    with app_context(database_url):
+        from sqlalchemy.exc import OperationalError
+        from app import db
+        from models import Trade
+        from settlement import settle_due_trades, settle_expired_trades
+
+        rng = random.Random(index)
+        drainer = index % 2 == 0
+        settled = retries = 0
+        while True:
+            try:
+                if drainer:
+                    mode = ('batch', 'sql')[(index // 2) % 2]
+                    count = settle_due_trades(limit=BATCH_SIZE, mode=mode)
+                else:
+                    due = db.session.query(Trade.id).filter(
+                        Trade.status == 'active', Trade.expiry_time <= datetime.utcnow()
+                    ).limit(50).all()
+                    db.session.rollback()
+                    count = len(settle_expired_trades(trade_ids=[rng.choice(due)[0]])) if due else 0
+            except OperationalError:
+                # SQLite: another process held the write lock past the busy timeout
+                db.session.rollback()
+                retries += 1
+                continue
+            settled += count
+            if not count:
+                remaining = db.session.query(Trade.id).filter(Trade.status == 'active').count()
+                db.session.rollback()
+                if not remaining:
+                    break
+                time.sleep(0.05)
+        results[index] = (settled, retries)
+
+def verify(reported):
+    from app import db
+    from models import Trade, Wallet, Transaction
+    from settlement import WON, LOST
+
+    failures = []
+    trades = Trade.query.all()
+    open_trades = [t for t in trades if t.status not in (WON, LOST)]
+    if open_trades:
+        failures.append(f"{len(open_trades)} trades left unsettled, e.g. status {open_trades[0].status!r}")
+    if reported != len(trades):
+        failures.append(f"workers reported {reported} settlements for {len(trades)} trades")
+
+    expected = {}
+    for trade in trades:
+        if trade.status == WON:
+            credit = expected.setdefault(trade.user_id, [BALANCE, DEMO_BALANCE])
+            credit[1 if trade.is_demo else 0] += trade.amount + trade.profit_loss
+    for wallet in Wallet.query.all():
+        balance, demo = expected.get(wallet.user_id, [BALANCE, DEMO_BALANCE])
+        if (wallet.balance, wallet.demo_balance) != (balance, demo):
+            failures.append(f"user {wallet.user_id}: wallet {wallet.balance}/{wallet.demo_balance}, "
+                            f"expected {balance}/{demo}")
+
+    wins = sum(1 for t in trades if t.status == WON)
+    credits = Transaction.query.filter_by(transaction_type='trade_win').count()
+    if credits != wins:
+        failures.append(f"{credits} trade_win transactions for {wins} won trades")
+    return len(trades), wins, failures
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    trades = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    tmp = tempfile.TemporaryDirectory()
+    database_url = sys.argv[3] if len(sys.argv) > 3 else f"sqlite:///{os.path.join(tmp.name, 'stress.db')}"
+
+    ctx = multiprocessing.get_context('spawn')
+    with app_context(database_url):
+        seed(trades)
+
+    manager = ctx.Manager()
+    results = manager.dict()
+    started = time.perf_counter()
+    processes = [ctx.Process(target=worker, args=(database_url, i, results)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    with app_context(database_url):
+        total, wins, failures = verify(sum(settled for settled, _ in results.values()))
+
+    print(f"{workers} workers, {total} trades on {database_url.split(':')[0]}: {elapsed:.1f} s, "
+          f"{wins} won, {sum(r for _, r in results.values())} lock retries")
+    for index in sorted(results.keys()):
+        settled, retries = results[index]
+        role = 'drain ' + ('batch', 'sql')[(index // 2) % 2] if index % 2 == 0 else 'single-trade'
+        print(f"  worker {index:>2} ({role:<12}) settled {settled:>6}")
+    if failures:
+        print("FAIL")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("PASS: every trade settled once and every payout credited exactly once")
+
+if __name__ == '__main__':
+    main()
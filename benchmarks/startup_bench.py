@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time and RSS of the market data modules a gunicorn
+worker loads via routes.py, with yfinance/pandas imported eagerly (before)
+and lazily on first use (after)
+
+Each sample runs in a fresh interpreter. Usage:
+    python benchmarks/startup_bench.py [runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+if sys.argv[1] == 'eager':
+    import yfinance, pandas  # what market_data.py used to import at module load
+import market_data, payout_manager
+elapsed = time.perf_counter() - started
+rss_kb = 0
+try:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': elapsed, 'rss_kb': rss_kb,
+                  'yfinance_loaded': 'yfinance' in sys.modules,
+                  'pandas_loaded': 'pandas' in sys.modules}))
+'''
+
+def sample(mode):
+    env = dict(os.environ, TWELVE_DATA_API_KEY='', QUOTE_REFRESH_INTERVAL='0')
+    output = subprocess.run([sys.executable, '-c', PROBE, mode], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def report(label, samples):
+    seconds = statistics.median(s['seconds'] for s in samples) * 1000
+    rss = statistics.median(s['rss_kb'] for s in samples) / 1024
+    print(f"{label:<22} import {seconds:8.1f} ms   RSS {rss:7.1f} MiB   "
+          f"yfinance loaded: {samples[0]['yfinance_loaded']}   pandas loaded: {samples[0]['pandas_loaded']}")
+    return seconds, rss
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"median of {runs} fresh interpreters per mode")
+    before = report('eager (before)', [sample('eager') for _ in range(runs)])
+    after = report('lazy (after)', [sample('lazy') for _ in range(runs)])
+    print(f"saved per worker: {before[0] - after[0]:.1f} ms import, {before[1] - after[1]:.1f} MiB RSS")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-call latency of TwelveDataAPI against a local stub server,
+comparing one-shot requests.get calls with the pooled keep-alive session
+
+Usage: python benchmarks/twelve_data_session_bench.py [calls]
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from credit_scheduler import CreditScheduler
+from twelve_data_integration import TwelveDataAPI
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # allow keep-alive
+    disable_nagle_algorithm = True  # avoid delayed-ACK stalls between header and body writes
+
+    def do_GET(self):
+        body = json.dumps({'price': '1.08450'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def run(label, call, calls):
+    call()  # warm-up
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<24} mean {statistics.mean(samples):7.3f} ms   "
+          f"p50 {percentile(samples, 50):7.3f} ms   p99 {percentile(samples, 99):7.3f} ms")
+    return statistics.mean(samples)
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    params = {'symbol': 'EUR/USD', 'apikey': 'bench'}
+    # Unlimited credits so the scheduler never throttles the benchmark
+    api = TwelveDataAPI(base_url=base_url, scheduler=CreditScheduler(per_minute=10**9, per_day=10**12))
+
+    print(f"{calls} calls against {base_url} (plain HTTP, so TLS handshake savings are not included)")
+    before = run('requests.get (before)', lambda: requests.get(f"{base_url}/price", params=params, timeout=10).json(), calls)
+    after = run('pooled session (after)', lambda: api.get_real_time_price('EURUSD'), calls)
+    print(f"speedup: {before / after:.2f}x")
+
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Candle aggregation engine for TradePro
+Builds higher-timeframe OHLCV candles (5m/15m/30m/1h/4h/1d) from 1-minute
+bars in process, so switching chart timeframes needs no extra upstream
+request.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from candle_store import INTERVAL_SECONDS, format_timestamp
+
+BASE_INTERVAL = '1m'
+AGGREGATE_INTERVALS = ('5m', '15m', '30m', '1h', '4h', '1d')
+
+# Chart ranges (?period=) and their length in seconds; every timeframe keeps
+# enough candles to cover the longest one
+CHART_PERIODS = {'1h': 3600, '4h': 14400, '1d': 86400}
+
+def aggregate_columns(ts, opens, highs, lows, closes, volumes, seconds):
+    """Bucket ascending bars into candles `seconds` wide (all column arrays)"""
+    if len(ts) == 0:
+        return ts, opens, highs, lows, closes, volumes
+    
+    buckets = (ts // seconds) * seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(ts)]))
+    return (buckets[starts],
+            opens[starts],
+            np.maximum.reduceat(highs, starts),
+            np.minimum.reduceat(lows, starts),
+            closes[ends - 1],
+            np.add.reduceat(volumes, starts))
+
+def records_to_columns(records):
+    """(ts, open, high, low, close, volume) tuples -> float64 column arrays"""
+    if not records:
+        return tuple(np.empty(0) for _ in range(6))
+    return tuple(np.asarray(records, dtype=np.float64).T)
+
+class CandleAggregator:
+    """Per-symbol 1m bars folded incrementally into every higher timeframe.
+    
+    Each update only touches the open candle of each timeframe and appends
+    new ones; nothing is re-aggregated from scratch. A revised still-open
+    1m bar replaces the previous version's close and volume, while highs
+    and lows only ever widen.
+    """
+    
+    def __init__(self, intervals=AGGREGATE_INTERVALS, max_candles=None):
+        self.intervals = (BASE_INTERVAL,) + tuple(intervals)
+        self.max_candles = max_candles or int(os.environ.get('CANDLE_AGGREGATOR_MAX_CANDLES', 200))
+        longest = max(CHART_PERIODS.values())
+        self._retain = {interval: max(self.max_candles, -(-longest // INTERVAL_SECONDS[interval]))
+                        for interval in self.intervals}
+        self._series = {}  # (symbol, interval) -> [[ts, o, h, l, c, v], ...]
+        self._lock = threading.Lock()
+    
+    def retained(self, interval):
+        """Candles per series that are always kept (up to twice as many may be held)"""
+        return self._retain.get(interval, self.max_candles)
+    
+    def has(self, symbol):
+        return (symbol, BASE_INTERVAL) in self._series
+    
+    def seed(self, symbol, records):
+        """Replace a symbol's series with ones built from stored 1m records"""
+        with self._lock:
+            for interval in self.intervals:
+                self._series.pop((symbol, interval), None)
+            self._update(symbol, records_to_columns(records), partial=False)
+    
+    def update(self, symbol, columns, partial=False):
+        """Fold ascending 1m bars (column arrays) into every timeframe.
+        
+        With partial=False a bar at the current 1m tail's timestamp is a
+        revised version of it (an upstream re-fetch); with partial=True it
+        carries only the ticks since the last update and is merged in.
+        """
+        with self._lock:
+            self._update(symbol, columns, partial)
+    
+    def _update(self, symbol, columns, partial):
+        ts, opens, highs, lows, closes, volumes = (np.asarray(col, dtype=np.float64) for col in columns)
+        base = self._series.get((symbol, BASE_INTERVAL))
+        if base:
+            keep = ts >= base[-1][0]
+            if not keep.all():
+                ts, opens, highs, lows, closes, volumes = (col[keep] for col in (ts, opens, highs, lows, closes, volumes))
+            if len(ts) and ts[0] == base[-1][0] and not partial:
+                # Only the change in the revised bar's volume is new
+                volumes = volumes.copy()
+                volumes[0] -= base[-1][5]
+        if len(ts) == 0:
+            return
+        
+        for interval in self.intervals:
+            seconds = INTERVAL_SECONDS[interval]
+            agg = aggregate_columns(ts, opens, highs, lows, closes, volumes, seconds)
+            rows = np.column_stack(agg).tolist()
+            series = self._series.setdefault((symbol, interval), [])
+            
+            if series and series[-1][0] == rows[0][0]:
+                tail, first = series[-1], rows.pop(0)
+                tail[2] = max(tail[2], first[2])
+                tail[3] = min(tail[3], first[3])
+                tail[4] = first[4]
+                tail[5] += first[5]
+            series.extend(rows)
+            keep = self._retain[interval]
+            if len(series) > 2 * keep:
+                del series[:-keep]
+    
+    def _rows(self, symbol, interval, limit, since):
+        """Copies of the last `limit` rows, only those starting at or after `since` if given"""
+        with self._lock:
+            series = self._series.get((symbol, interval), ())
+            first = max(0, len(series) - limit)
+            if since is not None:
+                # New and still-open candles sit at the tail; scan back to the cursor
+                i = len(series)
+                while i > first and series[i - 1][0] >= since:
+                    i -= 1
+                first = i
+            return [list(row) for row in series[first:]]
+    
+    def candles(self, symbol, interval, limit=50, decimals=None, since=None):
+        """Last `limit` candles in the chart format used by get_historical_data.
+        
+        With `since` (epoch seconds) only candles starting at or after it are
+        returned, which includes the still-open candle a client already has.
+        """
+        rows = self._rows(symbol, interval, limit, since)
+        
+        def rnd(value):
+            return round(value, decimals) if decimals is not None else value
+        return [
+            {
+                'timestamp': format_timestamp(ts),
+                'open': rnd(o),
+                'high': rnd(h),
+                'low': rnd(l),
+                'close': rnd(c),
+                'volume': int(v)
+            }
+            for ts, o, h, l, c, v in rows
+        ]
+    
+    def columns(self, symbol, interval, limit=50, decimals=None, since=None):
+        """Same candles as candles() as parallel arrays; times are epoch seconds"""
+        rows = self._rows(symbol, interval, limit, since)
+        ts, opens, highs, lows, closes, volumes = zip(*rows) if rows else ((),) * 6
+        
+        def rnd(values):
+            return [round(v, decimals) for v in values] if decimals is not None else list(values)
+        return {
+            'time': [int(t) for t in ts],
+            'open': rnd(opens),
+            'high': rnd(highs),
+            'low': rnd(lows),
+            'close': rnd(closes),
+            'volume': [int(v) for v in volumes]
+        }
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'symbols': len({symbol for symbol, _ in self._series}),
+                'candles': sum(len(series) for series in self._series.values())
+            }
+
+# Singleton instance (upstream 1m bars; the price simulator keeps its own)
+candle_aggregator = CandleAggregator()
@@ -0,0 +1,193 @@
+"""
+Persistent local OHLC candle store for TradePro
+One append-only file of fixed-width binary records per (symbol, interval),
+read through mmap so chart history survives restarts without network I/O
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+# File header: magic + format version
+HEADER = struct.Struct('<8sI4x')
+MAGIC = b'THCANDLE'
+VERSION = 1
+
+# One record: bar open time (epoch seconds, UTC), open, high, low, close, volume
+RECORD = struct.Struct('<q5d')
+
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': 86400
+}
+
+def parse_timestamp(value):
+    """Epoch seconds for an ISO timestamp string or datetime; naive values are UTC"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def format_timestamp(epoch_seconds):
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).isoformat()
+
+class CandleStore:
+    def __init__(self, root_dir=None):
+        self.root_dir = root_dir or os.environ.get(
+            'CANDLE_STORE_DIR',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'candles')
+        )
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9_-]', '_', symbol)
+        return os.path.join(self.root_dir, f"{safe_symbol}_{interval}.bin")
+
+    def _lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def count(self, symbol, interval):
+        """Number of stored candles"""
+        try:
+            size = os.path.getsize(self._path(symbol, interval))
+        except OSError:
+            return 0
+        return max(0, (size - HEADER.size) // RECORD.size)
+
+    def read_records(self, symbol, interval, limit=None):
+        """Raw (timestamp, open, high, low, close, volume) tuples, oldest first"""
+        path = self._path(symbol, interval)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return []
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            records = (size - HEADER.size) // RECORD.size
+            if records <= 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if HEADER.unpack_from(mm, 0)[0] != MAGIC:
+                    print(f"Ignoring candle file with bad header: {path}")
+                    return []
+                first = records - limit if limit and limit < records else 0
+                start = HEADER.size + first * RECORD.size
+                end = HEADER.size + records * RECORD.size
+                return list(RECORD.iter_unpack(mm[start:end]))
+
+    def read(self, symbol, interval, limit=None):
+        """Stored candles in the chart format used by get_historical_data"""
+        return [
+            {
+                'timestamp': format_timestamp(ts),
+                'open': o,
+                'high': h,
+                'low': l,
+                'close': c,
+                'volume': int(v)
+            }
+            for ts, o, h, l, c, v in self.read_records(symbol, interval, limit)
+        ]
+
+    def last_timestamp(self, symbol, interval):
+        records = self.read_records(symbol, interval, limit=1)
+        return records[0][0] if records else None
+
+    def append(self, symbol, interval, candles):
+        """Append candles (oldest first) newer than the stored tail.
+
+        A candle with the same timestamp as the last stored record replaces
+        it in place, which is how an updated still-open bar is written.
+        Returns the number of records written.
+        """
+        path = self._path(symbol, interval)
+        os.makedirs(self.root_dir, exist_ok=True)
+        written = 0
+        
+        with self._lock(path):
+            with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as f:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    size = os.fstat(f.fileno()).st_size
+                    if size < HEADER.size:
+                        f.truncate(0)
+                        f.write(HEADER.pack(MAGIC, VERSION))
+                        size = HEADER.size
+                    # Drop any partial record left by an interrupted write
+                    size -= (size - HEADER.size) % RECORD.size
+                    records = (size - HEADER.size) // RECORD.size
+                    
+                    last_ts = None
+                    if records:
+                        f.seek(HEADER.size + (records - 1) * RECORD.size)
+                        last_ts = RECORD.unpack(f.read(RECORD.size))[0]
+                    
+                    for candle in candles:
+                        ts = parse_timestamp(candle['timestamp'])
+                        record = RECORD.pack(ts, float(candle['open']), float(candle['high']),
+                                             float(candle['low']), float(candle['close']),
+                                             float(candle.get('volume') or 0))
+                        if last_ts is not None and ts < last_ts:
+                            continue
+                        if last_ts is not None and ts == last_ts:
+                            # Rewrite the still-open bar in place
+                            f.seek(HEADER.size + (records - 1) * RECORD.size)
+                        else:
+                            f.seek(HEADER.size + records * RECORD.size)
+                            records += 1
+                            last_ts = ts
+                        f.write(record)
+                        written += 1
+                    f.flush()
+                finally:
+                    if fcntl:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        
+        self.touch(symbol, interval)
+        return written
+
+    def touch(self, symbol, interval):
+        """Mark the series as synced with the upstream just now"""
+        path = self._path(symbol, interval)
+        if os.path.exists(path):
+            os.utime(path, None)
+
+    def synced_age(self, symbol, interval):
+        """Seconds since the series was last synced, or None if never stored"""
+        try:
+            return time.time() - os.path.getmtime(self._path(symbol, interval))
+        except OSError:
+            return None
+
+    def missing_bars(self, symbol, interval, now=None):
+        """How many bars the upstream has that we do not (None if nothing is stored)"""
+        last_ts = self.last_timestamp(symbol, interval)
+        if last_ts is None:
+            return None
+        step = INTERVAL_SECONDS.get(interval, 60)
+        now = now if now is not None else time.time()
+        # +1 re-fetches the still-open last bar
+        return max(1, int((now - last_ts) // step) + 1)
+
+# Singleton instance
+candle_store = CandleStore()
@@ -0,0 +1,177 @@
+"""
+Credit-aware request scheduler for the Twelve Data API
+Token bucket over the per-minute credit limit plus a per-day budget, with
+callers admitted in priority order (user-facing chart and quote requests
+before status checks before background refreshes). Lower priorities may not dip into a reserve of each
+minute's credits and may only spend a share of the day's budget, so
+background work can never starve the requests above it.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+
+# Lower value = served first
+PRIORITY_CHART = 1
+PRIORITY_STATUS = 2
+PRIORITY_BACKGROUND = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_CHART: 'chart',
+    PRIORITY_STATUS: 'status',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+# How long a caller may queue for credits before degrading to cached/fallback data
+DEFAULT_MAX_WAITS = {
+    PRIORITY_CHART: 1.0,
+    PRIORITY_STATUS: 0.0,
+    PRIORITY_BACKGROUND: 0.0
+}
+
+# Fraction of the minute bucket a priority must leave for the priorities above it
+DEFAULT_RESERVES = {
+    PRIORITY_STATUS: 0.25,
+    PRIORITY_BACKGROUND: 0.5
+}
+
+# Fraction of the daily budget a priority may spend
+DEFAULT_DAY_SHARES = {
+    PRIORITY_BACKGROUND: 0.5
+}
+
+class CreditBudgetExhausted(Exception):
+    """Raised instead of calling the upstream when no credits are available in time"""
+    pass
+
+class CreditScheduler:
+    def __init__(self, per_minute=8, per_day=800, max_waits=None, reserves=None, day_shares=None):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_waits = dict(DEFAULT_MAX_WAITS)
+        if max_waits:
+            self.max_waits.update(max_waits)
+        reserves = {**DEFAULT_RESERVES, **(reserves or {})}
+        day_shares = {**DEFAULT_DAY_SHARES, **(day_shares or {})}
+        # Credits left untouched in the bucket, and daily credits allowed, per priority
+        self.reserves = {p: int(per_minute * reserves.get(p, 0.0)) for p in PRIORITY_NAMES}
+        self.day_caps = {p: int(per_day * day_shares.get(p, 1.0)) for p in PRIORITY_NAMES}
+        
+        self._refill_rate = per_minute / 60.0  # credits per second
+        self._tokens = float(per_minute)
+        self._last_refill = time.monotonic()
+        self._day = datetime.utcnow().date()
+        self._day_used = 0
+        self._day_used_by = {p: 0 for p in PRIORITY_NAMES}
+        
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        
+        self.granted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.rejected = {name: 0 for name in PRIORITY_NAMES.values()}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._last_refill) * self._refill_rate)
+        self._last_refill = now
+        
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+            self._day_used_by = {p: 0 for p in PRIORITY_NAMES}
+
+    def allowance(self, priority):
+        """(credits per minute, credits per day) a priority can count on"""
+        return self.per_minute - self.reserves.get(priority, 0), self.day_caps.get(priority, self.per_day)
+
+    def _reject(self, priority, reason):
+        self.rejected[PRIORITY_NAMES.get(priority, 'background')] += 1
+        raise CreditBudgetExhausted(reason)
+
+    def acquire(self, cost=1, priority=PRIORITY_CHART, max_wait=None):
+        """Block until `cost` credits are granted, or raise CreditBudgetExhausted"""
+        if max_wait is None:
+            max_wait = self.max_waits.get(priority, 0.0)
+        
+        reserve = self.reserves.get(priority, 0)
+        with self._cond:
+            self._refill()
+            if cost > self.per_minute - reserve:
+                self._reject(priority, f"Request needs {cost} credits, more than the "
+                                       f"{self.per_minute - reserve}/min this priority may use")
+            if self._day_used + cost > self.per_day:
+                self._reject(priority, f"Daily credit budget spent ({self._day_used}/{self.per_day})")
+            day_cap = self.day_caps.get(priority, self.per_day)
+            if self._day_used_by.get(priority, 0) + cost > day_cap:
+                self._reject(priority, f"Daily {PRIORITY_NAMES.get(priority, 'background')} credit share "
+                                       f"spent ({self._day_used_by.get(priority, 0)}/{day_cap})")
+            
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            deadline = time.monotonic() + max_wait
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == entry and self._tokens - reserve >= cost:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= cost
+                        self._day_used += cost
+                        self._day_used_by[priority] = self._day_used_by.get(priority, 0) + cost
+                        self.granted[PRIORITY_NAMES.get(priority, 'background')] += 1
+                        return
+                    
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject(priority, f"Per-minute credit budget spent ({self.per_minute}/min)")
+                    
+                    wait = remaining
+                    if self._tokens - reserve < cost:
+                        wait = min(wait, (cost + reserve - self._tokens) / self._refill_rate)
+                    self._cond.wait(wait)
+            finally:
+                # Leave the queue whether granted or rejected, and let the next waiter re-check
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def exhaust_minute(self):
+        """Drain the bucket when the upstream reports a rate limit we did not predict"""
+        with self._cond:
+            self._refill()
+            self._tokens = 0.0
+
+    def status(self):
+        """Current budget and queue depth"""
+        with self._cond:
+            self._refill()
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiters:
+                queued[PRIORITY_NAMES.get(priority, 'background')] += 1
+            return {
+                'per_minute_limit': self.per_minute,
+                'per_day_limit': self.per_day,
+                'minute_credits_available': round(self._tokens, 2),
+                'day_credits_used': self._day_used,
+                'day_credits_remaining': max(0, self.per_day - self._day_used),
+                'day_credits_used_by_priority': {PRIORITY_NAMES[p]: used for p, used in self._day_used_by.items()},
+                'reserves': {PRIORITY_NAMES[p]: reserve for p, reserve in self.reserves.items() if reserve},
+                'queue_depth': len(self._waiters),
+                'queued_by_priority': queued,
+                'granted': dict(self.granted),
+                'rejected': dict(self.rejected)
+            }
+
+def create_scheduler_from_env():
+    """Scheduler sized for the Twelve Data free tier unless overridden"""
+    return CreditScheduler(
+        per_minute=int(os.environ.get('TWELVE_DATA_CREDITS_PER_MINUTE', 8)),
+        per_day=int(os.environ.get('TWELVE_DATA_CREDITS_PER_DAY', 800)),
+        reserves={PRIORITY_BACKGROUND: float(os.environ.get('TWELVE_DATA_BACKGROUND_RESERVE', 0.5))},
+        day_shares={PRIORITY_BACKGROUND: float(os.environ.get('TWELVE_DATA_BACKGROUND_DAY_SHARE', 0.5))}
+    )
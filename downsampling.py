@@ -0,0 +1,103 @@
+"""
+Chart downsampling for TradePro
+Reduces long candle series to a target point count before they are
+serialised: Largest-Triangle-Three-Buckets for line charts, or OHLC bucket
+aggregation that keeps every bucket's true open, high, low and close.
+"""
+
+import numpy as np
+
+from candle_store import format_timestamp
+
+DOWNSAMPLE_METHODS = ('ohlc', 'lttb')
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket i covers edges[i]:edges[i + 1]; the last point is its own bucket
+    edges = np.floor(np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    sizes = np.diff(np.append(edges, n))
+    avg_x = np.add.reduceat(x, edges) / sizes
+    avg_y = np.add.reduceat(y, edges) / sizes
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+def ohlc_buckets(columns, target):
+    """Merge consecutive candles into `target` buckets of (nearly) equal size.
+
+    Each bucket takes its first time and open, the highest high, the lowest
+    low, its last close and the summed volume.
+    """
+    times = np.asarray(columns['time'])
+    n = len(times)
+    if target >= n or target < 1:
+        return columns
+
+    starts = np.unique(np.floor(np.arange(target) * n / target).astype(np.int64))
+    ends = np.append(starts[1:], n)
+    return {
+        'time': times[starts].tolist(),
+        'open': np.asarray(columns['open'])[starts].tolist(),
+        'high': np.maximum.reduceat(np.asarray(columns['high'], dtype=np.float64), starts).tolist(),
+        'low': np.minimum.reduceat(np.asarray(columns['low'], dtype=np.float64), starts).tolist(),
+        'close': np.asarray(columns['close'])[ends - 1].tolist(),
+        'volume': np.add.reduceat(np.asarray(columns['volume'], dtype=np.float64), starts).astype(np.int64).tolist()
+    }
+
+def downsample_columns(columns, target, method='ohlc'):
+    """Columnar candles (time/open/high/low/close/volume) reduced to at most `target` points.
+
+    'lttb' keeps a subset of the original candles chosen by their closes,
+    'ohlc' merges neighbouring candles.
+    """
+    if target is None or len(columns['time']) <= target:
+        return columns
+    if method == 'lttb':
+        kept = lttb_indices(columns['time'], columns['close'], target)
+        return {key: np.asarray(values)[kept].tolist() for key, values in columns.items()}
+    return ohlc_buckets(columns, target)
+
+def columns_to_candles(columns):
+    """Columnar candles -> the list-of-dicts chart format"""
+    return [
+        {
+            'timestamp': format_timestamp(ts),
+            'open': o,
+            'high': h,
+            'low': l,
+            'close': c,
+            'volume': int(v)
+        }
+        for ts, o, h, l, c, v in zip(columns['time'], columns['open'], columns['high'],
+                                     columns['low'], columns['close'], columns['volume'])
+    ]
+
+def candles_to_columns(candles):
+    """List-of-dicts chart candles -> columnar form (times stay as given)"""
+    return {
+        'time': [c['timestamp'] for c in candles],
+        'open': [c['open'] for c in candles],
+        'high': [c['high'] for c in candles],
+        'low': [c['low'] for c in candles],
+        'close': [c['close'] for c in candles],
+        'volume': [c.get('volume') or 0 for c in candles]
+    }
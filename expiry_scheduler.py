@@ -0,0 +1,160 @@
+"""
+Trade expiry scheduler for TradePro
+Keeps every pending trade expiry in an in-memory min-heap and hands each
+batch to the settlement engine as it falls due, instead of scanning the
+trades table on a timer or waiting for the browser to ask.
+"""
+
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from app import app, db
+from models import Trade
+from settlement import settle_due_trades
+
+# Seconds before a batch whose settlement failed is tried again
+RETRY_SECONDS = 5.0
+
+def expiry_timestamp(expiry_time):
+    """Naive UTC datetime -> epoch seconds"""
+    return expiry_time.replace(tzinfo=timezone.utc).timestamp()
+
+class ExpiryScheduler:
+    """Min-heap of (expiry timestamp, trade id) drained by one worker thread.
+
+    The worker sleeps until the earliest expiry, waits up to `max_lag`
+    seconds more so trades expiring together settle in one batch, then
+    settles everything that is due.
+    """
+
+    def __init__(self, max_lag=None, batch_size=None, clock=time.time):
+        self.max_lag = max_lag if max_lag is not None else float(os.environ.get('EXPIRY_SCHEDULER_MAX_LAG', 0.25))
+        self.batch_size = batch_size or int(os.environ.get('EXPIRY_SCHEDULER_BATCH_SIZE', 500))
+        self.clock = clock
+        self._heap = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self.batches = 0
+        self.settled = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_lag = 0.0
+
+    def load(self):
+        """Queue every active trade in the database (call inside an app context)"""
+        rows = db.session.query(Trade.id, Trade.expiry_time).filter(Trade.status == 'active').all()
+        with self._cond:
+            self._heap.extend((expiry_timestamp(expiry), trade_id) for trade_id, expiry in rows)
+            heapq.heapify(self._heap)
+            self._cond.notify()
+        return len(rows)
+
+    def add(self, trade_id, expiry_time):
+        """Queue a newly placed trade (ignored unless the worker is running)"""
+        if not self.is_running():
+            return
+        entry = (expiry_timestamp(expiry_time), trade_id)
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            # Only an earlier deadline changes how long the worker should sleep
+            if self._heap[0] is entry:
+                self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _next_batch(self):
+        """Block until a batch is due; returns [(expiry, trade id), ...] or None when stopped"""
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] + self.max_lag - self.clock()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                now = self.clock()
+                batch = []
+                while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                    batch.append(heapq.heappop(self._heap))
+                return batch
+        return None
+
+    def settle_batch(self, batch):
+        trade_ids = [trade_id for _, trade_id in batch]
+        try:
+            with app.app_context():
+                settled = settle_due_trades(now=datetime.utcnow(), trade_ids=trade_ids)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Expiry scheduler failed to settle {len(trade_ids)} trades: {e}")
+            retry_at = self.clock() + RETRY_SECONDS
+            with self._cond:
+                for _, trade_id in batch:
+                    heapq.heappush(self._heap, (retry_at, trade_id))
+            return 0
+
+        self.batches += 1
+        self.settled += settled
+        # Seconds between the oldest expiry in the batch and its settlement
+        self.last_lag = self.clock() - min(expiry for expiry, _ in batch)
+        return settled
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self.settle_batch(batch)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._cond:
+            self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='expiry-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def stats(self):
+        return {
+            'running': self.is_running(),
+            'pending': self.pending(),
+            'max_lag': self.max_lag,
+            'batches': self.batches,
+            'settled': self.settled,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_lag': round(self.last_lag, 3)
+        }
+
+# Singleton instance
+expiry_scheduler = ExpiryScheduler()
+
+def start_expiry_scheduler():
+    """Load pending expiries from the database and start settling them (EXPIRY_SCHEDULER_ENABLED=0 disables it)"""
+    if os.environ.get('EXPIRY_SCHEDULER_ENABLED', '1') == '0':
+        return False
+    # Start first so trades placed while loading are queued too; a trade
+    # queued twice is only settled once
+    expiry_scheduler.start()
+    with app.app_context():
+        pending = expiry_scheduler.load()
+    print(f"Expiry scheduler started with {pending} pending trades")
+    return True
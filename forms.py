@@ -4,6 +4,7 @@ from wtforms import StringField, PasswordField, EmailField, DecimalField, Select
 from wtforms.fields import DateField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, NumberRange, ValidationError
 from models import User
+from symbols import SYMBOLS, LISTED_SYMBOLS
 
 class LoginForm(FlaskForm):
     email = EmailField('Email', validators=[DataRequired(), Email()])
@@ -38,13 +39,7 @@ class RegisterForm(FlaskForm):
 
 class TradeForm(FlaskForm):
     asset = SelectField('Asset', choices=[
-        ('EURUSD', 'EUR/USD'),
-        ('GBPUSD', 'GBP/USD'),
-        ('USDJPY', 'USD/JPY'),
-        ('BTCUSD', 'BTC/USD'),
-        ('ETHUSD', 'ETH/USD'),
-        ('XAUUSD', 'Gold/USD'),
-        ('CRUDE', 'Crude Oil')
+        (symbol, SYMBOLS[symbol].label) for symbol in LISTED_SYMBOLS
     ], validators=[DataRequired()])
     
     trade_type = SelectField('Direction', choices=[
@@ -0,0 +1,279 @@
+"""
+Technical indicator engine for TradePro charts
+NumPy implementations of SMA, EMA, RSI, MACD, Bollinger Bands and ATR that
+carry their state forward, so each closed bar is only ever processed once.
+Results are cached per (source, symbol, interval) and per parameter set.
+"""
+
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bars per closed-form EMA block; keeps (1 - alpha) ** -n well inside float64
+EMA_BLOCK = 64
+
+INDICATOR_PARAMS = {
+    'sma': (20,),
+    'ema': (20,),
+    'rsi': (14,),
+    'macd': (12, 26, 9),
+    'bb': (20, 2),
+    'atr': (14,)
+}
+MAX_PERIOD = 500
+
+class IndicatorSpecError(ValueError):
+    """Unknown indicator or invalid parameters in a request"""
+    pass
+
+def parse_indicator_spec(text):
+    """'macd:12:26:9' -> ('macd', (12, 26, 9)); missing parameters take defaults"""
+    name, *raw = text.strip().lower().split(':')
+    if name not in INDICATOR_PARAMS:
+        raise IndicatorSpecError(f"Unknown indicator: {name}")
+    defaults = INDICATOR_PARAMS[name]
+    if len(raw) > len(defaults):
+        raise IndicatorSpecError(f"Too many parameters for {name}")
+    try:
+        params = tuple(float(v) if '.' in v else int(v) for v in raw) + defaults[len(raw):]
+    except ValueError:
+        raise IndicatorSpecError(f"Invalid parameters for {name}: {text}")
+    if not all(0 < p <= MAX_PERIOD for p in params):
+        raise IndicatorSpecError(f"Parameters for {name} must be between 0 and {MAX_PERIOD}")
+    # Periods are whole bars (the Bollinger width multiplier need not be)
+    periods = params[:1] if name == 'bb' else params
+    if any(p != int(p) for p in periods):
+        raise IndicatorSpecError(f"Periods for {name} must be whole numbers")
+    if name == 'bb':
+        return name, (int(params[0]), params[1])
+    return name, tuple(int(p) for p in params)
+
+def spec_label(name, params):
+    return '_'.join([name] + [f"{p:g}" for p in params])
+
+def _ema_filter(values, alpha, last):
+    """y[i] = alpha * x[i] + (1 - alpha) * y[i-1], vectorized in closed form per block"""
+    out = np.empty(len(values))
+    if alpha >= 1.0:
+        out[:] = values
+        return out
+    decay = 1.0 - alpha
+    for start in range(0, len(values), EMA_BLOCK):
+        x = values[start:start + EMA_BLOCK]
+        powers = decay ** np.arange(1, len(x) + 1)
+        block = powers * (last + alpha * np.cumsum(x / powers))
+        out[start:start + len(x)] = block
+        last = block[-1]
+    return out
+
+def _ema_run(values, period, alpha, state):
+    """EMA seeded with the SMA of its first `period` valid inputs.
+
+    state is {'seed': [...], 'last': value or None}; NaN inputs before the
+    seed is complete are skipped. Returns (outputs, new state).
+    """
+    out = np.full(len(values), np.nan)
+    seed = list(state['seed']) if state else []
+    last = state['last'] if state else None
+    i = 0
+    while last is None and i < len(values):
+        if not math.isnan(values[i]):
+            seed.append(float(values[i]))
+            if len(seed) == period:
+                last = sum(seed) / period
+                out[i] = last
+        i += 1
+    if last is not None and i < len(values):
+        out[i:] = _ema_filter(values[i:], alpha, last)
+        last = float(out[-1])
+    return out, {'seed': [] if last is not None else seed, 'last': last}
+
+def _rolling(values, tail, period):
+    """Windows of `period` ending at each new value, NaN-padded where history is short"""
+    x = np.concatenate((tail, values))
+    windows = sliding_window_view(x, period) if len(x) >= period else np.empty((0, period))
+    return x[-(period - 1):] if period > 1 else x[:0], windows
+
+def _pad(values, n):
+    """Last n values, NaN-filled at the front when there are fewer"""
+    if len(values) >= n:
+        return values[len(values) - n:]
+    return np.concatenate((np.full(n - len(values), np.nan), values))
+
+def sma(cols, state, period):
+    tail, windows = _rolling(cols['close'], state['tail'] if state else np.empty(0), period)
+    return {'sma': _pad(windows.mean(axis=1), len(cols['close']))}, {'tail': tail}
+
+def ema(cols, state, period):
+    out, ema_state = _ema_run(cols['close'], period, 2.0 / (period + 1), state)
+    return {'ema': out}, ema_state
+
+def bollinger(cols, state, period, width):
+    n = len(cols['close'])
+    tail, windows = _rolling(cols['close'], state['tail'] if state else np.empty(0), period)
+    middle = _pad(windows.mean(axis=1), n)
+    deviation = _pad(windows.std(axis=1), n)
+    return {'upper': middle + width * deviation, 'middle': middle, 'lower': middle - width * deviation}, {'tail': tail}
+
+def rsi(cols, state, period):
+    """Wilder's RSI"""
+    closes = cols['close']
+    prev = state['prev'] if state else None
+    previous = np.concatenate(([np.nan if prev is None else prev], closes[:-1]))
+    delta = closes - previous
+    gains, gain_state = _ema_run(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)),
+                                 period, 1.0 / period, state and state['gain'])
+    losses, loss_state = _ema_run(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)),
+                                  period, 1.0 / period, state and state['loss'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(losses == 0, 100.0, 100.0 - 100.0 / (1.0 + gains / losses))
+    values[np.isnan(gains) | np.isnan(losses)] = np.nan
+    new_state = {'prev': float(closes[-1]) if len(closes) else prev, 'gain': gain_state, 'loss': loss_state}
+    return {'rsi': values}, new_state
+
+def macd(cols, state, fast, slow, signal):
+    closes = cols['close']
+    fast_ema, fast_state = _ema_run(closes, fast, 2.0 / (fast + 1), state and state['fast'])
+    slow_ema, slow_state = _ema_run(closes, slow, 2.0 / (slow + 1), state and state['slow'])
+    line = fast_ema - slow_ema
+    signal_line, signal_state = _ema_run(line, signal, 2.0 / (signal + 1), state and state['signal'])
+    return ({'macd': line, 'signal': signal_line, 'histogram': line - signal_line},
+            {'fast': fast_state, 'slow': slow_state, 'signal': signal_state})
+
+def atr(cols, state, period):
+    """Wilder's Average True Range"""
+    highs, lows, closes = cols['high'], cols['low'], cols['close']
+    prev = state['prev'] if state else None
+    previous = np.concatenate(([np.nan if prev is None else prev], closes[:-1]))
+    ranges = np.fmax(highs - lows, np.fmax(np.abs(highs - previous), np.abs(lows - previous)))
+    values, ema_state = _ema_run(ranges, period, 1.0 / period, state and state['ema'])
+    return {'atr': values}, {'prev': float(closes[-1]) if len(closes) else prev, 'ema': ema_state}
+
+INDICATORS = {
+    'sma': sma,
+    'ema': ema,
+    'rsi': rsi,
+    'macd': macd,
+    'bb': bollinger,
+    'atr': atr
+}
+
+def run_indicator(name, params, cols, state=None):
+    """Advance one indicator over new bars; returns ({output: array}, new state)"""
+    return INDICATORS[name](cols, state, *params)
+
+def records_to_indicator_columns(records):
+    """Candle store records -> the column dict indicators and the engine take"""
+    arr = np.asarray(records, dtype=np.float64).reshape(-1, 6)
+    return {'time': arr[:, 0], 'open': arr[:, 1], 'high': arr[:, 2],
+            'low': arr[:, 3], 'close': arr[:, 4], 'volume': arr[:, 5]}
+
+class _SeriesEntry:
+    """Closed bars seen for one (source, symbol, interval) and each indicator's state"""
+
+    def __init__(self):
+        self.cols = {key: np.empty(0) for key in ('time', 'high', 'low', 'close')}
+        self.specs = {}  # (name, params) -> [outputs dict, state]
+
+class IndicatorEngine:
+    """Cached, incrementally updated indicators over an append-only candle source.
+
+    The last candle a source returns is treated as still open: indicators
+    are evaluated on it from the cached state but it is not folded in until
+    a newer candle shows it has closed.
+    """
+
+    def __init__(self, maxsize=None, max_points=None):
+        self.maxsize = maxsize or int(os.environ.get('INDICATOR_CACHE_SIZE', 256))
+        self.max_points = max_points or int(os.environ.get('INDICATOR_MAX_POINTS', 1000))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compute(self, key, specs, fetch_columns, limit=50):
+        """Indicator values for the last `limit` candles of a source.
+
+        key identifies the series, e.g. ('sim', 'EURUSD', '5m'). specs are
+        (name, params) pairs. fetch_columns(since) returns column arrays
+        (time, high, low, close, ...) for candles starting at or after
+        `since`, or the whole available series when since is None.
+        Returns {'time': [...], label: {output: [...]}} with NaN as None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _SeriesEntry()
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+
+            last_ts = entry.cols['time'][-1] if len(entry.cols['time']) else None
+            fresh = fetch_columns(last_ts)
+            times = np.asarray(fresh['time'], dtype=np.float64)
+            start = 0 if last_ts is None else int(np.searchsorted(times, last_ts, side='right'))
+            new = {k: np.asarray(fresh[k], dtype=np.float64)[start:] for k in entry.cols}
+            closed = {k: v[:-1] for k, v in new.items()}
+            open_bar = {k: v[-1:] for k, v in new.items()}
+
+            # Fold newly closed bars into every cached indicator
+            if len(closed['time']):
+                for spec, cached in entry.specs.items():
+                    outputs, cached[1] = run_indicator(*spec, closed, cached[1])
+                    for name, values in outputs.items():
+                        cached[0][name] = np.concatenate((cached[0][name], values))
+                for k in entry.cols:
+                    entry.cols[k] = np.concatenate((entry.cols[k], closed[k]))
+
+            result = {'time': np.concatenate((entry.cols['time'], open_bar['time']))[-limit:]}
+            for spec in specs:
+                cached = entry.specs.get(spec)
+                if cached is None:
+                    self.misses += 1
+                    outputs, state = run_indicator(*spec, entry.cols)
+                    cached = entry.specs[spec] = [outputs, state]
+                else:
+                    self.hits += 1
+                provisional = run_indicator(*spec, open_bar, cached[1])[0] if len(open_bar['time']) else {}
+                result[spec_label(*spec)] = {
+                    name: np.concatenate((values, provisional.get(name, values[:0])))[-limit:]
+                    for name, values in cached[0].items()
+                }
+
+            self._trim(entry)
+
+        return self._to_lists(result)
+
+    def _trim(self, entry):
+        if len(entry.cols['time']) <= 2 * self.max_points:
+            return
+        for k in entry.cols:
+            entry.cols[k] = entry.cols[k][-self.max_points:]
+        for cached in entry.specs.values():
+            for name in cached[0]:
+                cached[0][name] = cached[0][name][-self.max_points:]
+
+    @staticmethod
+    def _to_lists(result):
+        def clean(values):
+            return [None if math.isnan(v) else round(v, 8) for v in values.tolist()]
+        out = {'time': [int(t) for t in result.pop('time').tolist()]}
+        for label, outputs in result.items():
+            out[label] = {name: clean(values) for name, values in outputs.items()}
+        return out
+
+    def stats(self):
+        with self._lock:
+            return {
+                'series': len(self._entries),
+                'indicators': sum(len(e.specs) for e in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# Singleton instance
+indicator_engine = IndicatorEngine()
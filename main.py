@@ -1,5 +1,10 @@
 from app import app
 import routes  # noqa: F401
+from quote_refresher import start_quote_refresher
+from expiry_scheduler import start_expiry_scheduler
+
+start_quote_refresher()
+start_expiry_scheduler()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -4,60 +4,412 @@ Provides professional-grade financial data for trading platform
 """
 
 import requests
-import yfinance as yf
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 import random
 import time
 import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from credit_scheduler import CreditBudgetExhausted, PRIORITY_CHART
+from candle_store import candle_store, INTERVAL_SECONDS, parse_timestamp
+from downsampling import downsample_columns, columns_to_candles, candles_to_columns
+from candle_aggregator import candle_aggregator, records_to_columns, BASE_INTERVAL, AGGREGATE_INTERVALS
+from price_simulator import price_simulator
+from symbols import SYMBOLS_BY_CLASS, YAHOO_TICKERS, QUOTED_SYMBOLS, get_symbol, get_asset_class
+# yfinance/pandas are only imported by the provider on first use
+from market_providers import yahoo_provider, history_to_columns, history_to_candles  # noqa: F401
 
 # Import Twelve Data integration
 try:
-    from twelve_data_integration import twelve_data_api
+    from twelve_data_integration import twelve_data_api, TwelveDataRequestError
     TWELVE_DATA_AVAILABLE = True
 except ImportError:
     TWELVE_DATA_AVAILABLE = False
+    TwelveDataRequestError = Exception
+
+# Chart periods (Yahoo Finance style) in seconds, for downsampled history
+PERIOD_SECONDS = {
+    '1d': 86400,
+    '5d': 5 * 86400,
+    '1mo': 30 * 86400,
+    '3mo': 91 * 86400,
+    '6mo': 182 * 86400,
+    '1y': 365 * 86400
+}
+
+# Longest time stored candles are served without re-syncing the tail upstream
+CANDLE_STORE_MAX_AGE = float(os.environ.get('CANDLE_STORE_MAX_AGE', 60))
+
+# Seconds a cached quote stays fresh, per asset class
+# (override with QUOTE_CACHE_TTL_FOREX, QUOTE_CACHE_TTL_CRYPTO, ...)
+DEFAULT_QUOTE_TTLS = {
+    'forex': 5.0,
+    'crypto': 5.0,
+    'index': 15.0,
+    'commodity': 15.0,
+    'default': 10.0
+}
+
+class QuoteCache:
+    """Process-wide per-symbol quote cache with TTL by asset class and LRU eviction"""
+
+    def __init__(self, ttls=None, max_entries=256):
+        self.ttls = dict(DEFAULT_QUOTE_TTLS)
+        for asset_class in self.ttls:
+            env_ttl = os.environ.get(f'QUOTE_CACHE_TTL_{asset_class.upper()}')
+            if env_ttl:
+                self.ttls[asset_class] = float(env_ttl)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key):
+        """Return the last value stored under key even if its TTL has passed.
+
+        Expired entries stay in the LRU until evicted so they can be served
+        when the upstream credit budget is spent.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.stale_hits += 1
+            return entry[1]
+
+    def set(self, key, value, asset_class='default'):
+        """Store value under key using the TTL of its asset class"""
+        ttl = self.ttls.get(asset_class, self.ttls['default'])
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'stale_hits': self.stale_hits,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'ttls': dict(self.ttls)
+            }
+
+# Shared by every RealMarketData instance in the process
+quote_cache = QuoteCache(max_entries=int(os.environ.get('QUOTE_CACHE_MAX_ENTRIES', 256)))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+    pass
+
+class CircuitBreaker:
+    """Per-provider circuit breaker with closed, open and half-open states.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are refused immediately. Once `cooldown` seconds have passed a single probe
+    call is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=3, cooldown=30.0,
+                 counted_exceptions=(Exception,), ignored_exceptions=()):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.counted_exceptions = counted_exceptions
+        self.ignored_exceptions = ignored_exceptions
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_started = None
+        self._lock = threading.Lock()
+        
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+        self.last_error = None
+
+    def allow_request(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.cooldown:
+                    self.short_circuited += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_started = now
+                return True
+            # Half-open: one probe at a time; a probe that never reported back
+            # is abandoned after another cool-down
+            if now - self._probe_started < self.cooldown:
+                self.short_circuited += 1
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                print(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self._probe_started = None
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error) if error else None
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"Circuit for {self.name} opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_started = None
+
+    def release(self):
+        """Give back a half-open probe slot without a verdict"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_started = time.monotonic() - self.cooldown
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker, raising CircuitOpenError when refused"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = func(*args, **kwargs)
+        except self.ignored_exceptions:
+            self.release()
+            raise
+        except self.counted_exceptions as e:
+            self.record_failure(e)
+            raise
+        except Exception:
+            # The provider answered, just not usefully (e.g. unknown symbol)
+            self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'cooldown': self.cooldown,
+                'successes': self.successes,
+                'failures': self.failures,
+                'short_circuited': self.short_circuited,
+                'times_opened': self.times_opened,
+                'last_error': self.last_error
+            }
+
+_breaker_threshold = int(os.environ.get('MARKET_DATA_BREAKER_THRESHOLD', 3))
+_breaker_cooldown = float(os.environ.get('MARKET_DATA_BREAKER_COOLDOWN', 30))
+
+# One breaker per upstream provider, shared by the whole process
+provider_breakers = {
+    'twelve_data': CircuitBreaker('twelve_data', _breaker_threshold, _breaker_cooldown,
+                                  counted_exceptions=(TwelveDataRequestError,),
+                                  ignored_exceptions=(CreditBudgetExhausted,)),
+    'yahoo': CircuitBreaker('yahoo', _breaker_threshold, _breaker_cooldown)
+}
+
+class SingleFlight:
+    """Collapses concurrent identical fetches into one in-flight call.
+
+    The first caller for a key runs the fetch; callers that arrive while it
+    is in flight block on it and receive the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
 
-class RealMarketData:
     def __init__(self):
-        self.forex_pairs = {
-            'EURUSD': 'EURUSD=X',
-            'GBPUSD': 'GBPUSD=X', 
-            'USDJPY': 'USDJPY=X',
-            'USDCAD': 'USDCAD=X',
-            'AUDUSD': 'AUDUSD=X'
-        }
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = self._Call()
+                self.executed += 1
+                leader = True
         
-        self.crypto_pairs = {
-            'BTCUSD': 'BTC-USD',
-            'ETHUSD': 'ETH-USD',
-            'ADAUSD': 'ADA-USD',
-            'DOTUSD': 'DOT-USD'
-        }
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
         
-        self.stock_indices = {
-            'SPX500': '^GSPC',
-            'NASDAQ': '^IXIC',
-            'DOW': '^DJI'
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'shared': self.shared
+            }
+
+# In-flight upstream fetches keyed by (provider, symbol, endpoint)
+upstream_flights = SingleFlight()
+
+class QuoteSnapshot:
+    """Latest batch of quotes published by the background refresher.
+
+    The refresher swaps in a whole new dict per cycle, so readers never
+    take a lock and never see a half-written batch.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age if max_age is not None else float(os.environ.get('QUOTE_SNAPSHOT_MAX_AGE', 60))
+        self._quotes = {}
+        self.published_at = None
+        self.cycles = 0
+
+    def publish(self, quotes):
+        """Replace the snapshot with a new {symbol: quote} batch"""
+        now = time.monotonic()
+        merged = dict(self._quotes)
+        for symbol, quote in quotes.items():
+            merged[symbol] = (now, quote)
+        self._quotes = merged
+        self.published_at = now
+        self.cycles += 1
+
+    def get(self, symbol):
+        """Return the snapshot quote for symbol, or None if absent or stale"""
+        entry = self._quotes.get(symbol)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        return entry[1]
+
+    def staleness(self, symbols):
+        """How many of `symbols` have a fresh, stale or no snapshot quote, and the oldest quote's age"""
+        now = time.monotonic()
+        quotes = self._quotes
+        ages = [now - quotes[symbol][0] for symbol in symbols if symbol in quotes]
+        fresh = sum(1 for age in ages if age <= self.max_age)
+        return {
+            'fresh': fresh,
+            'stale': len(ages) - fresh,
+            'missing': len(symbols) - len(ages),
+            'oldest_age_seconds': round(max(ages), 1) if ages else None
         }
-        
-        self.commodities = {
-            'XAUUSD': 'GC=F',  # Gold
-            'XAGUSD': 'SI=F',  # Silver
-            'CRUDE': 'CL=F',   # Crude Oil
-            'NGAS': 'NG=F'     # Natural Gas
+
+    def stats(self):
+        age = time.monotonic() - self.published_at if self.published_at is not None else None
+        return {
+            'symbols': len(self._quotes),
+            'cycles': self.cycles,
+            'age_seconds': age,
+            'max_age': self.max_age
         }
 
-    def get_real_price(self, symbol):
+quote_snapshot = QuoteSnapshot()
+
+def _yahoo_tickers_for(asset_class):
+    return MappingProxyType({symbol: YAHOO_TICKERS[symbol] for symbol in SYMBOLS_BY_CLASS[asset_class]
+                             if symbol in YAHOO_TICKERS})
+
+class RealMarketData:
+    def __init__(self):
+        # Views onto the shared symbol registry (built once at import)
+        self.forex_pairs = _yahoo_tickers_for('forex')
+        self.crypto_pairs = _yahoo_tickers_for('crypto')
+        self.stock_indices = _yahoo_tickers_for('index')
+        self.commodities = _yahoo_tickers_for('commodity')
+
+    def get_real_price(self, symbol, priority=PRIORITY_CHART):
         """Get real-time price from Twelve Data API or Yahoo Finance fallback"""
+        snapshot_quote = quote_snapshot.get(symbol)
+        if snapshot_quote and snapshot_quote.get('price', 0) > 0:
+            return snapshot_quote['price']
+
+        cache_key = ('price', symbol)
+        cached = quote_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        asset_class = self._get_asset_class(symbol)
         try:
             # Try Twelve Data first if available and configured
             if TWELVE_DATA_AVAILABLE and os.environ.get('TWELVE_DATA_API_KEY'):
                 try:
-                    price = twelve_data_api.get_real_time_price(symbol)
+                    price = self._fetch('twelve_data', symbol, 'price',
+                                        twelve_data_api.get_real_time_price, symbol, priority=priority)
                     if price and price > 0:
+                        quote_cache.set(cache_key, price, asset_class)
                         return price
+                except CreditBudgetExhausted as e:
+                    stale = quote_cache.get_stale(cache_key)
+                    if stale is not None:
+                        return stale
+                    print(f"Twelve Data credits exhausted for {symbol}: {e}")
+                except CircuitOpenError:
+                    pass
                 except Exception as e:
                     print(f"Twelve Data error for {symbol}: {e}")
             
@@ -66,14 +418,18 @@ class RealMarketData:
             if not yf_symbol:
                 return self._get_fallback_price(symbol)
             
-            ticker = yf.Ticker(yf_symbol)
-            info = ticker.info
+            try:
+                info = self._fetch('yahoo', yf_symbol, 'info', self._fetch_yf_info, yf_symbol)
+            except CircuitOpenError:
+                return self._get_fallback_price(symbol)
             
             # Try to get current price
             current_price = info.get('regularMarketPrice') or info.get('currentPrice') or info.get('previousClose')
             
             if current_price:
-                return {'price': float(current_price)}
+                result = {'price': float(current_price)}
+                quote_cache.set(cache_key, result, asset_class)
+                return result
             else:
                 fallback_price = self._get_fallback_price(symbol)
                 return {'price': fallback_price}
@@ -83,8 +439,29 @@ class RealMarketData:
             fallback_price = self._get_fallback_price(symbol)
             return fallback_price
 
-    def get_historical_data(self, symbol, period='1d', interval='1m'):
-        """Get historical data for charts"""
+    def get_historical_data(self, symbol, period='1d', interval='1m', max_points=None):
+        """Get historical data for charts
+        
+        By default the last 50 candles are returned. With max_points the
+        whole `period` is served from the candle store, merged into at most
+        max_points OHLC buckets.
+        """
+        if max_points:
+            return self._downsampled_history(symbol, period, interval, max_points)
+        
+        # Higher timeframes come from the 1m series once it covers the chart
+        if interval in AGGREGATE_INTERVALS:
+            aggregated = self._aggregated_history(symbol, period, interval)
+            if aggregated:
+                return aggregated
+        
+        # Serve straight from the local candle store while it is in sync
+        synced_age = candle_store.synced_age(symbol, interval)
+        if synced_age is not None and synced_age < min(INTERVAL_SECONDS.get(interval, 60), CANDLE_STORE_MAX_AGE):
+            stored = candle_store.read(symbol, interval, limit=50)
+            if stored:
+                return stored
+        
         try:
             print(f"Attempting to fetch historical data for {symbol}")
             
@@ -95,10 +472,23 @@ class RealMarketData:
                     twelve_interval = self._map_interval_to_twelve_data(interval)
                     print(f"Using Twelve Data with interval: {twelve_interval}")
                     
-                    chart_data = twelve_data_api.get_time_series(symbol, twelve_interval, 100)
+                    # Only ask for the bars after the newest one the candle store holds
+                    last_ts = candle_store.last_timestamp(symbol, interval)
+                    missing = candle_store.missing_bars(symbol, interval)
+                    outputsize = 100 if missing is None else min(100, missing)
+                    
+                    chart_data = self._fetch('twelve_data', symbol, f'time_series:{twelve_interval}',
+                                             twelve_data_api.get_time_series, symbol, twelve_interval, outputsize,
+                                             since=last_ts)
                     if chart_data and len(chart_data) > 0:
                         print(f"Retrieved {len(chart_data)} data points from Twelve Data")
-                        return chart_data[-50:]  # Return last 50 points
+                        return self._store_candles(symbol, interval, chart_data)
+                    if last_ts is not None:
+                        # No new bars upstream: the stored series is current
+                        candle_store.touch(symbol, interval)
+                        return candle_store.read(symbol, interval, limit=50)
+                except CircuitOpenError:
+                    pass
                 except Exception as e:
                     print(f"Twelve Data historical error for {symbol}: {e}")
             
@@ -106,51 +496,78 @@ class RealMarketData:
             yf_symbol = self._get_yf_symbol(symbol)
             if not yf_symbol:
                 print(f"No Yahoo Finance symbol found for {symbol}, using fallback")
-                return self._generate_fallback_data(symbol)
+                return self._stored_or_fallback_data(symbol, interval)
             
             print(f"Using Yahoo Finance symbol: {yf_symbol}")
-            ticker = yf.Ticker(yf_symbol)
             
             # Adjust parameters for different asset types
             if symbol in self.forex_pairs:
                 # Forex markets - use recent data with 5m intervals
-                hist = ticker.history(period='1d', interval='5m')
+                period, interval = '1d', '5m'
                 print(f"Fetching forex data: period=1d, interval=5m")
             else:
                 # Stocks/crypto - use requested parameters
-                hist = ticker.history(period=period, interval=interval)
                 print(f"Fetching non-forex data: period={period}, interval={interval}")
             
+            try:
+                hist = self._fetch('yahoo', yf_symbol, f'history:{period}:{interval}',
+                                   self._fetch_yf_history, yf_symbol, period, interval)
+            except CircuitOpenError:
+                return self._stored_or_fallback_data(symbol, interval)
+            
             print(f"Retrieved history shape: {hist.shape if not hist.empty else 'Empty'}")
             
             if hist.empty:
                 print("No historical data retrieved, using fallback")
-                return self._generate_fallback_data(symbol)
+                return self._stored_or_fallback_data(symbol, interval)
             
-            data_points = []
-            for timestamp, row in hist.iterrows():
-                try:
-                    data_points.append({
-                        'timestamp': timestamp.isoformat(),
-                        'open': float(row['Open']),
-                        'high': float(row['High']),
-                        'low': float(row['Low']),
-                        'close': float(row['Close']),
-                        'volume': int(row['Volume']) if not pd.isna(row['Volume']) else 0
-                    })
-                except Exception as row_error:
-                    print(f"Error processing row: {row_error}")
-                    continue
+            data_points = history_to_candles(hist)
             
             print(f"Processed {len(data_points)} data points")
-            return data_points[-50:]  # Return last 50 points
+            return self._store_candles(symbol, interval, data_points)
             
         except Exception as e:
             print(f"Error fetching historical data for {symbol}: {e}")
             import traceback
             traceback.print_exc()
-            return self._generate_fallback_data(symbol)
+            return self._stored_or_fallback_data(symbol, interval)
     
+    def _downsampled_history(self, symbol, period, interval, max_points):
+        """Candles covering `period` reduced to at most max_points buckets"""
+        latest = self.get_historical_data(symbol, period, interval)
+        bars = PERIOD_SECONDS.get(period, 86400) // INTERVAL_SECONDS.get(interval, 60)
+        try:
+            records = candle_store.read_records(symbol, interval, limit=bars)
+        except Exception as e:
+            print(f"Candle store read failed for {symbol} {interval}: {e}")
+            records = []
+        
+        if len(records) > len(latest):
+            columns = dict(zip(('time', 'open', 'high', 'low', 'close', 'volume'), zip(*records)))
+            return columns_to_candles(downsample_columns(columns, max_points))
+        # Nothing longer stored (e.g. generated fallback data): reduce what we have
+        columns = downsample_columns(candles_to_columns(latest), max_points)
+        return [dict(zip(('timestamp', 'open', 'high', 'low', 'close', 'volume'), row))
+                for row in zip(*(columns[k] for k in ('time', 'open', 'high', 'low', 'close', 'volume')))]
+
+    def _aggregated_history(self, symbol, period, interval, limit=50):
+        """Candles for a higher timeframe built from the 1m series, or None.
+        
+        Returns None (so the timeframe is fetched directly) until the stored
+        1m history spans `limit` candles of the requested width.
+        """
+        bars_needed = limit * INTERVAL_SECONDS[interval] // INTERVAL_SECONDS[BASE_INTERVAL]
+        if candle_store.count(symbol, BASE_INTERVAL) < bars_needed:
+            return None
+        
+        # Brings the 1m series up to date, feeding the aggregator on the way
+        self.get_historical_data(symbol, period, BASE_INTERVAL)
+        if not candle_aggregator.has(symbol):
+            candle_aggregator.seed(symbol, candle_store.read_records(symbol, BASE_INTERVAL))
+        
+        candles = candle_aggregator.candles(symbol, interval, limit)
+        return candles if len(candles) >= limit else None
+
     def _map_interval_to_twelve_data(self, interval):
         """Map our interval format to Twelve Data format"""
         mapping = {
@@ -164,15 +581,34 @@ class RealMarketData:
         }
         return mapping.get(interval, '1min')
 
-    def get_market_info(self, symbol):
+    def get_market_info(self, symbol, priority=PRIORITY_CHART):
         """Get comprehensive market information"""
+        snapshot_quote = quote_snapshot.get(symbol)
+        if snapshot_quote and snapshot_quote.get('price', 0) > 0:
+            return snapshot_quote
+
+        cache_key = ('info', symbol)
+        cached = quote_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        asset_class = self._get_asset_class(symbol)
         try:
             # Try Twelve Data first if available and configured
             if TWELVE_DATA_AVAILABLE and os.environ.get('TWELVE_DATA_API_KEY'):
                 try:
-                    quote_data = twelve_data_api.get_real_time_quote(symbol)
+                    quote_data = self._fetch('twelve_data', symbol, 'quote',
+                                             twelve_data_api.get_real_time_quote, symbol, priority=priority)
                     if quote_data and quote_data.get('price', 0) > 0:
+                        quote_cache.set(cache_key, quote_data, asset_class)
                         return quote_data
+                except CreditBudgetExhausted as e:
+                    stale = quote_cache.get_stale(cache_key)
+                    if stale is not None:
+                        return stale
+                    print(f"Twelve Data credits exhausted for {symbol}: {e}")
+                except CircuitOpenError:
+                    pass
                 except Exception as e:
                     print(f"Twelve Data quote error for {symbol}: {e}")
             
@@ -181,8 +617,10 @@ class RealMarketData:
             if not yf_symbol:
                 return self._get_fallback_info(symbol)
             
-            ticker = yf.Ticker(yf_symbol)
-            info = ticker.info
+            try:
+                info = self._fetch('yahoo', yf_symbol, 'info', self._fetch_yf_info, yf_symbol)
+            except CircuitOpenError:
+                return self._get_fallback_info(symbol)
             
             current_price = info.get('regularMarketPrice') or info.get('currentPrice') or info.get('previousClose')
             previous_close = info.get('previousClose', current_price)
@@ -190,7 +628,7 @@ class RealMarketData:
             change = current_price - previous_close if current_price and previous_close else 0
             change_percent = (change / previous_close * 100) if previous_close else 0
             
-            return {
+            info_data = {
                 'symbol': symbol,
                 'price': float(current_price) if current_price else 0,
                 'open': float(info.get('regularMarketOpen', current_price)) if current_price else 0,
@@ -204,37 +642,91 @@ class RealMarketData:
                 'low_24h': info.get('dayLow', current_price),
                 'timestamp': datetime.now().isoformat()
             }
+            if current_price:
+                quote_cache.set(cache_key, info_data, asset_class)
+            return info_data
             
         except Exception as e:
             print(f"Error fetching market info for {symbol}: {e}")
             return self._get_fallback_info(symbol)
 
+    def _fetch(self, provider, symbol, endpoint, func, *args, **kwargs):
+        """Call a provider through its circuit breaker, sharing one in-flight
+        request among all concurrent callers for the same (provider, symbol, endpoint)"""
+        return upstream_flights.do((provider, symbol, endpoint),
+                                   provider_breakers[provider].call, func, *args, **kwargs)
+
+    def _fetch_yf_info(self, yf_symbol):
+        """Fetch the Yahoo Finance info dict (one network round trip)"""
+        return yahoo_provider.fetch_info(yf_symbol)
+
+    def _fetch_yf_history(self, yf_symbol, period, interval):
+        """Fetch Yahoo Finance OHLCV history as a DataFrame"""
+        return yahoo_provider.fetch_history(yf_symbol, period, interval)
+
     def _get_yf_symbol(self, symbol):
         """Map our symbols to Yahoo Finance symbols"""
-        all_symbols = {**self.forex_pairs, **self.crypto_pairs, **self.stock_indices, **self.commodities}
-        return all_symbols.get(symbol)
+        return YAHOO_TICKERS.get(symbol)
+
+    def get_all_symbols(self):
+        """Every symbol this provider knows how to quote"""
+        return list(QUOTED_SYMBOLS)
+
+    def _get_asset_class(self, symbol):
+        """Asset class used to pick the quote cache TTL"""
+        return get_asset_class(symbol)
 
     def _get_fallback_price(self, symbol):
         """Fallback prices when real data is unavailable"""
-        fallback_prices = {
-            'EURUSD': 1.08450,
-            'GBPUSD': 1.26320,
-            'USDJPY': 148.750,
-            'BTCUSD': 43250.00,
-            'ETHUSD': 2650.00,
-            'XAUUSD': 2025.50,
-            'CRUDE': 78.45,
-            'SPX500': 4750.00,
-            'NASDAQ': 15200.00
-        }
-        base_price = fallback_prices.get(symbol, 1.00000)
+        info = get_symbol(symbol)
+        base_price = info.base_price if info else 1.00000
         # Add small random variation
         variation = (random.random() - 0.5) * base_price * 0.001
         price = base_price + variation
         return price
 
+    def _store_candles(self, symbol, interval, candles):
+        """Persist fetched candles and return the last 50 from the store"""
+        try:
+            candle_store.append(symbol, interval, candles)
+            if interval == BASE_INTERVAL:
+                self._feed_aggregator(symbol, candles)
+            stored = candle_store.read(symbol, interval, limit=50)
+            if stored:
+                return stored
+        except Exception as e:
+            print(f"Candle store write failed for {symbol} {interval}: {e}")
+        return candles[-50:]  # Return last 50 points
+
+    def _feed_aggregator(self, symbol, candles):
+        """Fold freshly fetched 1m bars into the higher timeframes"""
+        if not candle_aggregator.has(symbol):
+            candle_aggregator.seed(symbol, candle_store.read_records(symbol, BASE_INTERVAL))
+            return
+        records = [
+            (parse_timestamp(c['timestamp']), float(c['open']), float(c['high']),
+             float(c['low']), float(c['close']), float(c.get('volume') or 0))
+            for c in candles
+        ]
+        candle_aggregator.update(symbol, records_to_columns(records))
+
+    def _stored_or_fallback_data(self, symbol, interval):
+        """Stale stored candles beat generated ones when every upstream fails"""
+        try:
+            stored = candle_store.read(symbol, interval, limit=50)
+            if stored:
+                return stored
+        except Exception as e:
+            print(f"Candle store read failed for {symbol} {interval}: {e}")
+        return self._generate_fallback_data(symbol)
+
     def _generate_fallback_data(self, symbol):
         """Generate realistic fallback data when real data is unavailable"""
+        # Registry symbols chart the shared simulated tick history
+        candles = price_simulator.candles(symbol, '1m', limit=50)
+        if candles:
+            return candles
+        
         base_price = self._get_fallback_price(symbol)
         data_points = []
         
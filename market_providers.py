@@ -0,0 +1,94 @@
+"""
+Market data provider interface for TradePro
+Heavy provider libraries (yfinance, pandas) are imported on first use so
+that workers which never fall back to Yahoo Finance never pay for them
+"""
+
+import importlib
+import threading
+
+class MarketDataProvider:
+    """Base class for upstream market data sources"""
+    
+    name = None
+    
+    def fetch_info(self, provider_symbol):
+        """Raw quote/info payload for a provider-specific symbol"""
+        raise NotImplementedError
+    
+    def fetch_history(self, provider_symbol, period, interval):
+        """Raw OHLCV history for a provider-specific symbol"""
+        raise NotImplementedError
+    
+    def is_loaded(self):
+        """Whether the provider's client library has been imported yet"""
+        return True
+
+class YahooFinanceProvider(MarketDataProvider):
+    name = 'yahoo'
+    
+    def __init__(self):
+        self._yf = None
+        self._lock = threading.Lock()
+    
+    @property
+    def yf(self):
+        if self._yf is None:
+            with self._lock:
+                if self._yf is None:
+                    self._yf = importlib.import_module('yfinance')
+        return self._yf
+    
+    def is_loaded(self):
+        return self._yf is not None
+    
+    def fetch_info(self, provider_symbol):
+        return self.yf.Ticker(provider_symbol).info
+    
+    def fetch_history(self, provider_symbol, period, interval):
+        return self.yf.Ticker(provider_symbol).history(period=period, interval=interval)
+
+OHLC_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+def history_to_columns(hist):
+    """Columnar candles straight from a yfinance OHLCV DataFrame.
+    
+    Returns parallel lists keyed timestamp/open/high/low/close/volume.
+    Rows with missing prices are dropped and missing volume becomes 0,
+    all in bulk rather than row by row.
+    """
+    import numpy as np  # already loaded with pandas by the time a DataFrame exists
+    
+    hist = hist.dropna(subset=OHLC_COLUMNS)
+    index = hist.index
+    if getattr(index, 'tz', None) is not None:
+        utc_values = index.tz_convert('UTC').tz_localize(None).values
+        timestamps = np.char.add(np.datetime_as_string(utc_values, unit='s'), '+00:00')
+    else:
+        timestamps = np.datetime_as_string(index.values, unit='s')
+    
+    if 'Volume' in hist:
+        volume = hist['Volume'].fillna(0).to_numpy(dtype='int64')
+    else:
+        volume = [0] * len(hist)
+    
+    return {
+        'timestamp': timestamps.tolist(),
+        'open': hist['Open'].to_numpy(dtype='float64').tolist(),
+        'high': hist['High'].to_numpy(dtype='float64').tolist(),
+        'low': hist['Low'].to_numpy(dtype='float64').tolist(),
+        'close': hist['Close'].to_numpy(dtype='float64').tolist(),
+        'volume': volume.tolist() if hasattr(volume, 'tolist') else volume
+    }
+
+def history_to_candles(hist):
+    """Candle dicts (the get_historical_data format) from a yfinance DataFrame"""
+    columns = history_to_columns(hist)
+    return [
+        {'timestamp': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for t, o, h, l, c, v in zip(columns['timestamp'], columns['open'], columns['high'],
+                                    columns['low'], columns['close'], columns['volume'])
+    ]
+
+# Singleton instance
+yahoo_provider = YahooFinanceProvider()
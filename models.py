@@ -90,10 +90,10 @@ class Trade(db.Model):
             won = current_price < self.entry_price
         
         if won:
-            self.status = 'profit'
+            self.status = 'won'
             self.profit_loss = float(self.amount) * (float(self.payout_percentage) / 100)
         else:
-            self.status = 'lose'
+            self.status = 'lost'
             self.profit_loss = -float(self.amount)
 
 class StakingPosition(db.Model):
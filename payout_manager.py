@@ -7,34 +7,12 @@ import requests
 import json
 from datetime import datetime, timedelta
 from market_data import market_data
+from symbols import BASE_PAYOUTS, get_asset_class
 
 class PayoutManager:
     def __init__(self):
-        self.base_payouts = {
-            # Forex pairs - typically lower volatility, higher payouts
-            'EURUSD': 85.0,
-            'GBPUSD': 83.0,
-            'USDJPY': 84.0,
-            'USDCAD': 82.0,
-            'AUDUSD': 81.0,
-            
-            # Cryptocurrencies - higher volatility, variable payouts
-            'BTCUSD': 78.0,
-            'ETHUSD': 76.0,
-            'ADAUSD': 75.0,
-            'DOTUSD': 74.0,
-            
-            # Commodities - medium volatility
-            'XAUUSD': 80.0,  # Gold
-            'XAGUSD': 79.0,  # Silver
-            'CRUDE': 77.0,   # Oil
-            'NGAS': 76.0,    # Natural Gas
-            
-            # Stock Indices - medium volatility
-            'SPX500': 82.0,
-            'NASDAQ': 81.0,
-            'DOW': 83.0
-        }
+        # Tradable assets and their base payouts, from the shared symbol registry
+        self.base_payouts = BASE_PAYOUTS
         
         self.volatility_adjustments = {
             'low': 2.0,      # Low volatility = higher payout
@@ -53,7 +31,7 @@ class PayoutManager:
             1440: 1.0   # 1 day
         }
     
-    def get_current_payout(self, asset, expiry_minutes=5):
+    def get_current_payout(self, asset, expiry_minutes=5, volatility_level=None):
         """
         Calculate real-time payout percentage based on:
         - Base asset payout
@@ -64,7 +42,8 @@ class PayoutManager:
         base_payout = self.base_payouts.get(asset, 75.0)
         
         # Get volatility adjustment
-        volatility_level = self.calculate_volatility_level(asset)
+        if volatility_level is None:
+            volatility_level = self.calculate_volatility_level(asset)
         volatility_adj = self.volatility_adjustments.get(volatility_level, 0.0)
         
         # Get time decay adjustment
@@ -81,11 +60,12 @@ class PayoutManager:
         
         return round(final_payout, 1)
     
-    def calculate_volatility_level(self, asset):
+    def calculate_volatility_level(self, asset, market_info=None):
         """Calculate current volatility level for the asset"""
         try:
             # Get recent price data
-            market_info = market_data.get_market_info(asset)
+            if market_info is None:
+                market_info = market_data.get_market_info(asset)
             change_percent = abs(market_info.get('change_percent', 0))
             
             # Classify volatility based on price change
@@ -107,8 +87,10 @@ class PayoutManager:
         now = datetime.utcnow()
         hour = now.hour
         
+        asset_class = get_asset_class(asset)
+        
         # Forex markets (24/5)
-        if asset in ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCAD', 'AUDUSD']:
+        if asset_class == 'forex':
             # Higher liquidity during major sessions
             if 7 <= hour <= 17:  # London + NY overlap
                 return 1.0
@@ -118,7 +100,7 @@ class PayoutManager:
                 return -0.5  # Lower liquidity periods
         
         # Crypto markets (24/7)
-        elif asset in ['BTCUSD', 'ETHUSD', 'ADAUSD', 'DOTUSD']:
+        elif asset_class == 'crypto':
             return 0.0  # No adjustment for 24/7 markets
         
         # Commodities and stocks (specific hours)
@@ -134,14 +116,16 @@ class PayoutManager:
         
         for asset in self.base_payouts.keys():
             try:
+                # One market info lookup per asset, shared by every expiry
+                level = self.calculate_volatility_level(asset)
                 payouts[asset] = {
-                    '1min': self.get_current_payout(asset, 1),
-                    '5min': self.get_current_payout(asset, 5),
-                    '15min': self.get_current_payout(asset, 15),
-                    '30min': self.get_current_payout(asset, 30),
-                    '1hour': self.get_current_payout(asset, 60),
-                    '4hour': self.get_current_payout(asset, 240),
-                    '1day': self.get_current_payout(asset, 1440)
+                    '1min': self.get_current_payout(asset, 1, level),
+                    '5min': self.get_current_payout(asset, 5, level),
+                    '15min': self.get_current_payout(asset, 15, level),
+                    '30min': self.get_current_payout(asset, 30, level),
+                    '1hour': self.get_current_payout(asset, 60, level),
+                    '4hour': self.get_current_payout(asset, 240, level),
+                    '1day': self.get_current_payout(asset, 1440, level)
                 }
             except Exception as e:
                 print(f"Error calculating payouts for {asset}: {e}")
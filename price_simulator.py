@@ -0,0 +1,220 @@
+"""
+Seeded price-path simulator for TradePro
+Keeps one geometric-Brownian price path per symbol and advances every
+symbol at once with NumPy on a fixed tick clock. The chart, the ticker,
+trade entry and settlement all read the same current tick, and every tick is kept in per-symbol
+ring buffers for as-of lookups at settlement and folded into candles for
+every chart timeframe.
+"""
+
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from symbols import SYMBOLS
+from tick_buffer import TickBufferSet, ticks_to_candles
+from candle_aggregator import CandleAggregator
+
+# Ticks drawn per NumPy call when catching up after an idle period
+CATCH_UP_CHUNK = 4096
+
+# Generator stream (alongside the seed and session) for session opening prices
+OPEN_STREAM = 1
+
+class PriceSimulator:
+    """GBM price paths for every registry symbol.
+
+    The path is a pure function of (seed, session, tick). Each session (a UTC
+    day by default) opens at prices drawn around the registry base prices
+    from (seed, session) alone, and its ticks are a random walk seeded with
+    (seed, session) and bridged so that it ends exactly where the next
+    session opens. Prices are therefore continuous across session
+    boundaries, and every process with the same seed sees the same prices
+    at the same moment without replaying earlier sessions. Registry
+    volatility is the standard deviation of hourly log returns.
+    """
+
+    def __init__(self, symbols=None, tick_seconds=None, seed=None, session_seconds=None, clock=time.time):
+        infos = [SYMBOLS[symbol] for symbol in (symbols or SYMBOLS)]
+        self.symbols = tuple(info.symbol for info in infos)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        
+        self.tick_seconds = tick_seconds or float(os.environ.get('PRICE_SIM_TICK_SECONDS', 1.0))
+        self.session_seconds = session_seconds or int(os.environ.get('PRICE_SIM_SESSION_SECONDS', 86400))
+        self.seed = seed if seed is not None else int(os.environ.get('PRICE_SIM_SEED', 42))
+        self.clock = clock
+        
+        self._base_log_prices = np.log(np.array([info.base_price for info in infos], dtype=np.float64))
+        self._sigma = np.array([info.volatility for info in infos], dtype=np.float64) * math.sqrt(self.tick_seconds / 3600.0)
+        # Spread of session opens around the base price; consecutive opens then
+        # differ by one session's worth of volatility
+        self._open_sigma = self._sigma * math.sqrt(self.session_seconds / self.tick_seconds / 2.0)
+        
+        self.ticks = TickBufferSet(self.symbols)
+        self.candle_aggregator = CandleAggregator()
+        
+        self._lock = threading.Lock()
+        self._session = None
+        self._rng = None
+        self._tick = None
+        self._open_log_prices = None
+        self._bridge = None
+        self._log_prices = None
+        self._prices = None
+
+    def _first_tick(self, session):
+        return int(session * self.session_seconds // self.tick_seconds)
+
+    def _opening_log_prices(self, session):
+        """Log prices every symbol opens `session` at (depends only on seed and session)"""
+        z = np.random.default_rng([self.seed, session, OPEN_STREAM]).standard_normal(len(self.symbols))
+        return self._base_log_prices + self._open_sigma * z
+
+    def _start_session(self, session):
+        self._session = session
+        self._tick = self._first_tick(session)
+        self._open_log_prices = self._opening_log_prices(session)
+        
+        # Sum the session's draws once so a constant per-tick correction can
+        # pin its last step onto the next session's open
+        steps = self._first_tick(session + 1) - self._tick
+        rng = np.random.default_rng([self.seed, session])
+        total = np.zeros(len(self.symbols))
+        for start in range(0, steps, CATCH_UP_CHUNK):
+            total += rng.standard_normal((min(CATCH_UP_CHUNK, steps - start), len(self.symbols))).sum(axis=0)
+        gap = self._opening_log_prices(session + 1) - self._open_log_prices - self._sigma * total
+        self._bridge = gap / steps
+        
+        self._rng = np.random.default_rng([self.seed, session])
+        self._log_prices = self._open_log_prices.copy()
+        self._prices = np.exp(self._log_prices)
+        self._record(np.array([self._tick * self.tick_seconds]), self._prices[np.newaxis, :])
+
+    def _advance(self, steps):
+        """Draw `steps` ticks for all symbols at once and record them"""
+        z = self._rng.standard_normal((steps, len(self.symbols)))
+        path = self._log_prices + np.cumsum(self._bridge + self._sigma * z, axis=0)
+        self._log_prices = path[-1]
+        self._prices = np.exp(self._log_prices)
+        
+        ticks = np.arange(self._tick + 1, self._tick + steps + 1)
+        self._record(ticks * self.tick_seconds, np.exp(path))
+        self._tick += steps
+
+    def _record(self, timestamps, price_matrix):
+        """Store new ticks (rows of price_matrix) and fold them into candles"""
+        self.ticks.extend(timestamps, price_matrix)
+        for j, symbol in enumerate(self.symbols):
+            starts, opens, highs, lows, closes, counts = ticks_to_candles(timestamps, price_matrix[:, j], 60)
+            self.candle_aggregator.update(symbol, (starts, opens, highs, lows, closes, counts.astype(np.float64)),
+                                          partial=True)
+
+    def _advance_to(self, target):
+        while self._tick < target:
+            self._advance(min(CATCH_UP_CHUNK, target - self._tick))
+
+    def _sync(self):
+        """Advance the path to the tick for the current wall-clock time"""
+        now = self.clock()
+        session = int(now // self.session_seconds)
+        if session != self._session:
+            if self._session is not None and session == self._session + 1:
+                # Idle across the boundary: record the rest of the old session
+                # so as-of lookups in that gap still find their ticks
+                self._advance_to(self._first_tick(session) - 1)
+            self._start_session(session)
+        
+        self._advance_to(int(now // self.tick_seconds))
+
+    def price(self, symbol):
+        """Current simulated price for symbol (None if the symbol is unknown)"""
+        i = self._index.get(symbol)
+        if i is None:
+            return None
+        with self._lock:
+            self._sync()
+            return float(self._prices[i])
+
+    def session_open(self, symbol):
+        """Price the current session opened at"""
+        i = self._index.get(symbol)
+        if i is None:
+            return None
+        with self._lock:
+            self._sync()
+            return math.exp(self._open_log_prices[i])
+
+    def snapshot(self):
+        """{symbol: price} for every symbol at the current tick"""
+        with self._lock:
+            self._sync()
+            return dict(zip(self.symbols, self._prices.tolist()))
+
+    def price_at(self, symbol, timestamp):
+        """Price in effect at `timestamp` (epoch seconds).
+        
+        Returns None for unknown symbols, future timestamps and times older
+        than the buffered history.
+        """
+        buffer = self.ticks.get(symbol)
+        if buffer is None:
+            return None
+        with self._lock:
+            self._sync()
+            if timestamp > self._tick * self.tick_seconds + self.tick_seconds:
+                return None
+            return buffer.price_at(timestamp)
+
+    def prices_at(self, symbol, timestamps):
+        """price_at() for an array of timestamps with one pass over the buffer.
+
+        Entries with no buffered price (future, too old, unknown symbol) are NaN.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        out = np.full(len(timestamps), np.nan)
+        buffer = self.ticks.get(symbol)
+        if buffer is None or len(timestamps) == 0:
+            return out
+        with self._lock:
+            self._sync()
+            ts, prices = buffer.window()
+            i = np.searchsorted(ts, timestamps, side='right') - 1
+            valid = (i >= 0) & (timestamps <= self._tick * self.tick_seconds + self.tick_seconds)
+            out[valid] = prices[i[valid]]
+        return out
+
+    def tick_span(self):
+        """(first, last) tick numbers held in the tick buffers, or None before the first tick"""
+        with self._lock:
+            self._sync()
+            ts, _ = self.ticks.get(self.symbols[0]).window()
+            if not len(ts):
+                return None
+            return int(round(ts[0] / self.tick_seconds)), int(round(ts[-1] / self.tick_seconds))
+
+    def candles(self, symbol, interval='1m', limit=50, since=None):
+        """Last `limit` simulated candles for a timeframe ('1m' ... '1d')"""
+        if symbol not in self._index:
+            return []
+        with self._lock:
+            self._sync()
+        return self.candle_aggregator.candles(symbol, interval, limit, decimals=5, since=since)
+
+    def candle_columns(self, symbol, interval='1m', limit=50, since=None):
+        """candles() as parallel time/open/high/low/close/volume arrays"""
+        if symbol not in self._index:
+            return self.candle_aggregator.columns(None, interval, 0)
+        with self._lock:
+            self._sync()
+        return self.candle_aggregator.columns(symbol, interval, limit, decimals=5, since=since)
+
+    def current_tick(self):
+        with self._lock:
+            self._sync()
+            return self._tick
+
+# Singleton instance
+price_simulator = PriceSimulator()
@@ -0,0 +1,142 @@
+"""
+Server-Sent Events price stream for TradePro
+One producer thread reads every simulated price once per tick and formats
+each symbol's event once; every connected client is handed the same
+pre-serialised events instead of running its own request cycle.
+
+Each open stream holds a server thread, so a worker only accepts
+PRICE_STREAM_MAX_CLIENTS streams at once and leaves the rest of its
+threads for ordinary requests; clients turned away poll instead.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from price_simulator import price_simulator
+
+def simulated_quote(symbol, price):
+    """Price update payload shared by the stream and the JSON fallback"""
+    session_open = price_simulator.session_open(symbol)
+    change = price - session_open if session_open else 0.0
+    return {
+        'symbol': symbol,
+        'price': price,
+        'change': change,
+        'change_percent': (change / session_open * 100) if session_open else 0.0,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+class StreamBody:
+    """SSE response body that gives its client slot back when the server closes it"""
+    
+    def __init__(self, chunks, release):
+        self._chunks = chunks
+        self._release = release
+    
+    def __iter__(self):
+        return self._chunks
+    
+    def close(self):
+        self._chunks.close()
+        release, self._release = self._release, None
+        if release:
+            release()
+
+class PriceBroadcaster:
+    """Fans simulated ticks out to SSE clients from a single producer thread.
+    
+    The producer only runs while at least one client is connected.
+    """
+    
+    def __init__(self, interval=None, heartbeat=None, max_stream_seconds=None, max_clients=None):
+        self.interval = interval or float(os.environ.get('PRICE_STREAM_INTERVAL', 1.0))
+        self.heartbeat = heartbeat or float(os.environ.get('PRICE_STREAM_HEARTBEAT', 15))
+        # Streams end after this long; EventSource reconnects on its own
+        self.max_stream_seconds = max_stream_seconds or float(os.environ.get('PRICE_STREAM_MAX_SECONDS', 300))
+        # Streams per process; keep well below the server's thread count
+        self.max_clients = max_clients or int(os.environ.get('PRICE_STREAM_MAX_CLIENTS', 16))
+        
+        self._cond = threading.Condition()
+        self._version = 0
+        self._events = {}  # symbol -> formatted SSE event
+        self._subscribers = 0
+        self._thread = None
+        self.ticks_published = 0
+        self.rejected = 0
+
+    def _produce(self):
+        while True:
+            with self._cond:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            
+            started = time.time()
+            events = {}
+            for symbol, price in price_simulator.snapshot().items():
+                data = json.dumps(simulated_quote(symbol, round(price, 5)))
+                events[symbol] = f"event: price\ndata: {data}\n\n"
+            
+            with self._cond:
+                self._events = events
+                self._version += 1
+                self.ticks_published += 1
+                self._cond.notify_all()
+            
+            time.sleep(max(0.0, self.interval - (time.time() - started)))
+
+    def _subscribe(self):
+        """Take a client slot; False when every slot is in use"""
+        with self._cond:
+            if self._subscribers >= self.max_clients:
+                self.rejected += 1
+                return False
+            self._subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._produce, name='price-stream', daemon=True)
+                self._thread.start()
+            return True
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def open_stream(self, symbols):
+        """SSE body for one client, or None when this process is already serving max_clients streams"""
+        if not self._subscribe():
+            return None
+        return StreamBody(self._events_for(symbols), self._unsubscribe)
+
+    def _events_for(self, symbols):
+        """Price events for `symbols`, then heartbeats"""
+        yield "retry: 3000\n\n"
+        version = None
+        deadline = time.time() + self.max_stream_seconds
+        while time.time() < deadline:
+            with self._cond:
+                self._cond.wait_for(lambda: self._version != version, timeout=self.heartbeat)
+                changed = self._version != version
+                version, events = self._version, self._events
+            
+            if changed:
+                chunk = ''.join(events[symbol] for symbol in symbols if symbol in events)
+                if chunk:
+                    yield chunk
+            else:
+                yield ": keep-alive\n\n"
+
+    def stats(self):
+        with self._cond:
+            return {
+                'subscribers': self._subscribers,
+                'max_clients': self.max_clients,
+                'rejected': self.rejected,
+                'running': self._thread is not None,
+                'ticks_published': self.ticks_published
+            }
+
+# Singleton instance
+price_broadcaster = PriceBroadcaster()
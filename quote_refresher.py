@@ -0,0 +1,143 @@
+"""
+Background quote refresher for TradePro
+Pulls the whole symbol universe from Twelve Data in batched requests and
+publishes it to the shared quote snapshot read by the request handlers.
+Batches are spread evenly over each cycle, and the cycle is stretched until
+it fits the background share of the credit budget.
+"""
+
+import os
+import threading
+import time
+from market_data import market_data, quote_snapshot, provider_breakers, CircuitOpenError
+from credit_scheduler import PRIORITY_BACKGROUND
+
+try:
+    from twelve_data_integration import twelve_data_api
+    TWELVE_DATA_AVAILABLE = True
+except ImportError:
+    TWELVE_DATA_AVAILABLE = False
+
+def budget_interval(symbol_count, per_minute, per_day):
+    """Shortest cycle (seconds) that refreshes symbol_count quotes within a credit allowance"""
+    if per_minute <= 0 or per_day <= 0:
+        return float('inf')
+    return max(60.0 * symbol_count / per_minute, 86400.0 * symbol_count / per_day)
+
+class QuoteRefresher:
+    def __init__(self, interval=None, batch_size=None):
+        self.interval = interval if interval is not None else float(os.environ.get('QUOTE_REFRESH_INTERVAL', 15))
+        self.symbols = market_data.get_all_symbols()
+        # Twelve Data accepts up to 120 symbols in one /quote call, but a batch
+        # is billed per symbol, so batches and cycles must fit the credits
+        # background work is allowed per minute and per day
+        if batch_size is None:
+            batch_size = int(os.environ.get('QUOTE_REFRESH_BATCH_SIZE', 120))
+            if TWELVE_DATA_AVAILABLE:
+                per_minute, per_day = twelve_data_api.scheduler.allowance(PRIORITY_BACKGROUND)
+                batch_size = min(batch_size, per_minute)
+                if self.interval > 0:
+                    self.interval = max(self.interval, budget_interval(len(self.symbols), per_minute, per_day))
+        self.batch_size = max(1, batch_size)
+        self.requests_made = 0
+        self.errors = 0
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def batches(self):
+        return [self.symbols[start:start + self.batch_size] for start in range(0, len(self.symbols), self.batch_size)]
+
+    def refresh_batch(self, batch):
+        """Fetch one batch and publish the results; raises CircuitOpenError while Twelve Data is down"""
+        try:
+            quotes = provider_breakers['twelve_data'].call(twelve_data_api.get_multiple_quotes, batch)
+            self.requests_made += 1
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Quote refresh failed for batch {batch}: {e}")
+            return {}
+        
+        # Drop empty quotes so readers fall through to the per-symbol path
+        quotes = {symbol: quote for symbol, quote in quotes.items() if quote.get('price', 0) > 0}
+        if quotes:
+            quote_snapshot.publish(quotes)
+        return quotes
+
+    def refresh_once(self):
+        """Fetch every symbol in batches and publish the results"""
+        quotes = {}
+        for batch in self.batches():
+            try:
+                quotes.update(self.refresh_batch(batch))
+            except CircuitOpenError:
+                break
+        return quotes
+
+    def _run(self):
+        # One batch at a time, each followed by its share of the cycle, so the
+        # minute bucket is never drained in a burst
+        while not self._stop_event.is_set():
+            for batch in self.batches():
+                started = time.monotonic()
+                try:
+                    self.refresh_batch(batch)
+                except CircuitOpenError:
+                    pass
+                pause = self.interval * len(batch) / len(self.symbols)
+                if self._stop_event.wait(max(0.0, pause - (time.monotonic() - started))):
+                    return
+
+    def symbol_max_age(self):
+        """Seconds a snapshot quote must stay usable: one full cycle plus one batch of slack"""
+        return self.interval * (1 + self.batch_size / max(1, len(self.symbols)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # Each symbol is refetched only once per cycle, so its quote has to
+        # stay servable until the next fetch or readers bypass the snapshot
+        quote_snapshot.max_age = max(quote_snapshot.max_age, self.symbol_max_age())
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='quote-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def stats(self):
+        return {
+            'running': self.is_running(),
+            'interval': self.interval,
+            'symbols': len(self.symbols),
+            'batch_size': self.batch_size,
+            'symbol_refresh_seconds': self.interval,
+            'requests_made': self.requests_made,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'snapshot': quote_snapshot.stats(),
+            'staleness': quote_snapshot.staleness(self.symbols)
+        }
+
+# Singleton instance
+quote_refresher = QuoteRefresher()
+
+def start_quote_refresher():
+    """Start the refresher when Twelve Data is configured (QUOTE_REFRESH_INTERVAL=0 disables it)"""
+    if not TWELVE_DATA_AVAILABLE or not os.environ.get('TWELVE_DATA_API_KEY'):
+        return False
+    if quote_refresher.interval <= 0:
+        return False
+    if quote_refresher.interval == float('inf'):
+        print("Quote refresher disabled: no background Twelve Data credits in the budget")
+        return False
+    quote_refresher.start()
+    return True
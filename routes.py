@@ -1,14 +1,17 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify, session
+from flask import render_template, redirect, url_for, flash, request, jsonify, session, Response
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import random
 import json
 import os
 import time
+import zlib
+import numpy as np
 from functools import wraps
+from sqlalchemy import func, case
 
 from app import app, db
 from models import User, Wallet, Trade, StakingPosition, Transaction, MarketData, DepositRequest, WithdrawalRequest, AdminSettings, KYCRequest, SupportTicket, SupportMessage
@@ -17,9 +20,18 @@ from forms import (LoginForm, RegisterForm, TradeForm, StakingForm, WithdrawForm
                   AdminSettingsForm, TradeManipulationForm, KYCForm, AdminKYCForm,
                   SupportTicketForm, SupportMessageForm, AdminSupportReplyForm)
 from utils import generate_market_price, get_asset_price
-from market_data import market_data
+from market_data import market_data, quote_cache, provider_breakers, upstream_flights
 from payout_manager import payout_manager
 from qr_generator import generate_crypto_qr_code
+from quote_refresher import quote_refresher
+from candle_store import candle_store, INTERVAL_SECONDS, parse_timestamp
+from candle_aggregator import CHART_PERIODS
+from price_simulator import price_simulator
+from price_stream import price_broadcaster, simulated_quote
+from downsampling import downsample_columns, columns_to_candles, DOWNSAMPLE_METHODS
+from indicators import indicator_engine, parse_indicator_spec, records_to_indicator_columns, IndicatorSpecError
+from settlement import settle_expired_trades, settle_due_trades, WON, LOST
+from expiry_scheduler import expiry_scheduler
 try:
     from twelve_data_integration import twelve_data_api
 except ImportError:
@@ -172,9 +184,9 @@ def dashboard():
     total_staking_rewards = sum(pos.calculate_rewards() for pos in active_staking)
     
     # Trading statistics
-    completed_trades = Trade.query.filter_by(user_id=current_user.id).filter(Trade.status.in_(['profit', 'lose'])).all()
+    completed_trades = Trade.query.filter_by(user_id=current_user.id).filter(Trade.status.in_(['won', 'lost'])).all()
     total_trades = len(completed_trades)
-    won_trades = len([t for t in completed_trades if t.status == 'profit'])
+    won_trades = len([t for t in completed_trades if t.status == 'won'])
     lost_trades = total_trades - won_trades
     win_rate = (won_trades / total_trades * 100) if total_trades > 0 else 0
     
@@ -381,6 +393,9 @@ def place_trade():
         db.session.add(transaction)
         db.session.commit()
         
+        # Settled by the expiry scheduler when it falls due
+        expiry_scheduler.add(trade.id, expiry_time)
+        
         # Return response
         response_data = {
             'success': True,
@@ -721,27 +736,79 @@ def api_market_data_legacy(symbol):
         'timestamp': datetime.utcnow().isoformat()
     })
 
+def conditional_response(etag, build_response):
+    """304 Not Modified when the client already holds `etag`, else the built response.
+    
+    `etag` must be derived from a cheap version check so an unchanged
+    resource costs no more than that check.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build_response()
+    response.set_etag(etag)
+    # Always revalidate; the body is per user
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def chart_request_options():
+    """(since, columnar) from a chart request's ?since= cursor and ?format=columns"""
+    since = request.args.get('since')
+    if since:
+        try:
+            since = float(since)
+        except ValueError:
+            try:
+                since = parse_timestamp(since)
+            except ValueError:
+                since = None
+    return since or None, request.args.get('format') == 'columns'
+
+def chart_etag():
+    """Chart bodies only change when the simulator advances a tick"""
+    query = zlib.crc32(request.full_path.encode())
+    return f"chart-{price_simulator.current_tick()}-{query:08x}"
+
+def chart_cursor(candles, columnar, since, time_key='timestamp'):
+    """Cursor for the next delta request: start time of the newest candle sent"""
+    if columnar:
+        return candles['time'][-1] if candles['time'] else since
+    return int(parse_timestamp(candles[-1][time_key])) if candles else since
+
 @app.route('/api/chart_data_legacy/<symbol>')
 def api_chart_data_legacy(symbol):
-    """Generate sample chart data for trading interface (legacy)"""
-    # Generate sample OHLC data
-    base_price = get_asset_price(symbol)
-    data = []
-    
-    for i in range(100):
-        timestamp = datetime.utcnow() - timedelta(minutes=100-i)
-        price_change = random.uniform(-0.02, 0.02)
-        price = base_price * (1 + price_change)
-        
-        data.append({
-            'time': timestamp.isoformat(),
-            'open': round(price * random.uniform(0.998, 1.002), 5),
-            'high': round(price * random.uniform(1.001, 1.005), 5),
-            'low': round(price * random.uniform(0.995, 0.999), 5),
-            'close': round(price, 5)
+    """Chart data for trading interface (legacy): 1-minute candles from the tick history
+    
+    Plain requests get the full list as before. With ?since=<cursor> only
+    new or changed candles come back, and ?format=columns returns parallel
+    arrays; both wrap the data with the next cursor.
+    """
+    since, columnar = chart_request_options()
+    
+    def build_response():
+        if columnar:
+            data = price_simulator.candle_columns(symbol, '1m', limit=100, since=since)
+        else:
+            data = [
+                {
+                    'time': candle['timestamp'],
+                    'open': candle['open'],
+                    'high': candle['high'],
+                    'low': candle['low'],
+                    'close': candle['close']
+                }
+                for candle in price_simulator.candles(symbol, '1m', limit=100, since=since)
+            ]
+            if since is None:
+                return jsonify(data)
+        
+        return jsonify({
+            'symbol': symbol,
+            'data': data,
+            'cursor': chart_cursor(data, columnar, since, time_key='time')
         })
     
-    return jsonify(data)
+    return conditional_response(chart_etag(), build_response)
 
 @app.route('/api/twelve-data-status')
 def api_twelve_data_status():
@@ -760,6 +827,13 @@ def api_twelve_data_status():
             'status': 'configured',
             'working': is_working,
             'usage': usage,
+            'credits': twelve_data_api.scheduler.status(),
+            'circuit_breakers': {name: breaker.metrics() for name, breaker in provider_breakers.items()},
+            'single_flight': upstream_flights.stats(),
+            'quote_cache': quote_cache.stats(),
+            'quote_refresher': quote_refresher.stats(),
+            'price_stream': price_broadcaster.stats(),
+            'expiry_scheduler': expiry_scheduler.stats(),
             'message': 'Twelve Data API is ready' if is_working else 'API key configured but not responding'
         })
     except Exception as e:
@@ -770,59 +844,138 @@ def api_twelve_data_status():
 
 @app.route('/api/market-data-new/<symbol>')
 def api_market_data_new(symbol):
-    """Get simulated market data for symbol"""
+    """Get simulated market data for symbol (polling fallback for /api/stream/prices)"""
     # Return simulated market data instead of real data
-    from utils import generate_market_price
     price = generate_market_price(symbol)
-    change = random.uniform(-0.005, 0.005) * price
-    
-    return jsonify({
-        'symbol': symbol,
-        'price': price,
-        'change': change,
-        'change_percent': (change / price * 100),
+    quote = simulated_quote(symbol, price)
+    quote.update({
         'volume': random.randint(10000, 100000),
         'high_24h': price * 1.01,
-        'low_24h': price * 0.99,
-        'timestamp': datetime.utcnow().isoformat()
+        'low_24h': price * 0.99
+    })
+    
+    return jsonify(quote)
+
+@app.route('/api/stream/prices')
+def api_stream_prices():
+    """Server-Sent Events stream of simulated prices for ?symbols=EURUSD,BTCUSD"""
+    requested = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    symbols = [s for s in dict.fromkeys(requested) if s in price_simulator.symbols]
+    if not symbols:
+        return jsonify({'error': 'No known symbols requested'}), 400
+    
+    body = price_broadcaster.open_stream(symbols)
+    if body is None:
+        # Every stream slot in this worker is taken; the client polls instead
+        return jsonify({'error': 'Price stream is full, poll /api/market-data-new'}), 503, {'Retry-After': '60'}
+    
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep reverse proxies from buffering the stream
     })
 
 @app.route('/api/chart-data-new/<symbol>')
 def api_chart_data_new(symbol):
-    """Get simulated chart data for trading interface"""
-    period = request.args.get('period', '1d')
+    """Get simulated chart data for trading interface
+    
+    ?since=<cursor> returns only candles new or changed since the cursor and
+    ?format=columns returns parallel arrays instead of a list of candles.
+    Every response carries the cursor for the next request.
+    
+    ?limit=<candles> asks for a longer range and ?points=<n> caps what is
+    sent by merging candles (downsample=ohlc, default) or keeping the
+    visually significant ones (downsample=lttb). Delta requests are never
+    downsampled. ?period=1h|4h|1d asks for that much history instead of a
+    candle count. limit is capped at the candles the aggregator always
+    retains; the response reports the limit applied and the time range
+    the candles actually cover.
+    """
+    period = request.args.get('period')
     interval = request.args.get('interval', '5m')
-    
-    # Generate simulated chart data
-    from utils import generate_market_price
-    base_price = generate_market_price(symbol)
-    data = []
-    
-    current_time = datetime.utcnow()
-    current_price = base_price
-    
-    for i in range(50):
-        timestamp = current_time - timedelta(minutes=50-i)
-        
-        # Simulate price movement
-        change = (random.random() - 0.5) * base_price * 0.005
-        current_price += change
+    since, columnar = chart_request_options()
+    
+    timeframe = interval if interval in INTERVAL_SECONDS else '5m'
+    if period is not None and period not in CHART_PERIODS:
+        return jsonify({'error': f"Unknown period: {period}"}), 400
+    limit = request.args.get('limit', type=int) or request.args.get('outputsize', type=int)
+    if limit is not None:
+        period = None  # an explicit candle count wins
+    elif period:
+        limit = -(-CHART_PERIODS[period] // INTERVAL_SECONDS[timeframe])
+    else:
+        limit = 50
+    limit = min(max(limit, 1), price_simulator.candle_aggregator.retained(timeframe))
+    points = request.args.get('points', type=int)
+    method = request.args.get('downsample', 'ohlc')
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({'error': f"Unknown downsample method: {method}"}), 400
+    
+    def build_response():
+        # Candles aggregated in process from the simulated ticks
+        columns = price_simulator.candle_columns(symbol, timeframe, limit=limit, since=since)
+        if points and since is None:
+            downsampled = downsample_columns(columns, points, method)
+            data = downsampled if columnar else columns_to_candles(downsampled)
+        elif columnar:
+            data = columns
+        else:
+            data = columns_to_candles(columns)
         
-        data.append({
-            'timestamp': timestamp.isoformat(),
-            'open': current_price,
-            'high': current_price * (1 + random.random() * 0.002),
-            'low': current_price * (1 - random.random() * 0.002),
-            'close': current_price,
-            'volume': random.randint(1000, 10000)
+        times = columns['time']
+        return jsonify({
+            'symbol': symbol,
+            'data': data,
+            'period': period,
+            'interval': interval,
+            'limit': limit,
+            'range': {
+                'candles': len(times),
+                'from': times[0] if times else None,
+                'to': times[-1] if times else None
+            },
+            'cursor': chart_cursor(data, columnar, since)
         })
     
-    return jsonify({
-        'symbol': symbol,
-        'data': data,
-        'period': period,
-        'interval': interval
-    })
+    return conditional_response(chart_etag(), build_response)
+
+@app.route('/api/indicators/<symbol>')
+def api_indicators(symbol):
+    """Precomputed chart indicators, e.g. ?interval=5m&indicators=sma:20,rsi:14,macd:12:26:9
+    
+    source=simulated (default) reads the same candles as /api/chart-data-new;
+    source=store reads upstream candles from the local candle store.
+    Values line up with the returned 'time' array (epoch seconds).
+    """
+    interval = request.args.get('interval', '5m')
+    timeframe = interval if interval in INTERVAL_SECONDS else '5m'
+    source = request.args.get('source', 'simulated')
+    limit = min(max(request.args.get('limit', 50, type=int), 1), indicator_engine.max_points)
+    try:
+        specs = [parse_indicator_spec(spec) for spec in
+                 request.args.get('indicators', 'sma:20').split(',') if spec.strip()]
+    except IndicatorSpecError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if source == 'store':
+        def fetch_columns(since):
+            cols = records_to_indicator_columns(
+                candle_store.read_records(symbol, timeframe, limit=indicator_engine.max_points))
+            start = 0 if since is None else int(np.searchsorted(cols['time'], since, side='left'))
+            return {k: v[start:] for k, v in cols.items()}
+    elif source == 'simulated':
+        def fetch_columns(since):
+            return price_simulator.candle_columns(symbol, timeframe, since=since,
+                                                  limit=2 * price_simulator.candle_aggregator.retained(timeframe))
+    else:
+        return jsonify({'success': False, 'error': f"Unknown source: {source}"}), 400
+    
+    def build_response():
+        values = indicator_engine.compute((source, symbol, timeframe), specs, fetch_columns, limit=limit)
+        return jsonify({'success': True, 'symbol': symbol, 'interval': timeframe, **values})
+    
+    if source == 'simulated':
+        return conditional_response(chart_etag(), build_response)
+    return build_response()
 
 @app.context_processor
 def inject_global_vars():
@@ -845,62 +998,52 @@ def inject_global_vars():
 @app.route('/process_trades')
 def process_expired_trades():
     """Process expired trades (normally would be a background task)"""
-    expired_trades = Trade.query.filter(
-        Trade.status == 'active',
-        Trade.expiry_time <= datetime.utcnow()
-    ).all()
-    
-    for trade in expired_trades:
-        current_price = get_asset_price(trade.asset)
-        trade.calculate_result(current_price)
-        
-        # Update wallet based on result
-        wallet = trade.user.wallet
-        if trade.status == 'won':
-            if trade.is_demo:
-                wallet.demo_balance += trade.amount + trade.profit_loss
-            else:
-                wallet.balance += trade.amount + trade.profit_loss
-            
-            # Create transaction
-            transaction = Transaction(
-                user_id=trade.user_id,
-                transaction_type='trade',
-                amount=trade.amount + trade.profit_loss,
-                description=f'Won trade: {trade.asset} {trade.trade_type}'
-            )
-            db.session.add(transaction)
-    
-    db.session.commit()
-    return jsonify({'processed': len(expired_trades)})
+    return jsonify({'processed': settle_due_trades()})
+
+def trade_version(user_id):
+    """Fingerprint of a user's trades that changes when one is placed or closed"""
+    count, last_id, active, last_closed = db.session.query(
+        func.count(Trade.id),
+        func.max(Trade.id),
+        func.sum(case((Trade.status == 'active', 1), else_=0)),
+        func.max(Trade.closed_at)
+    ).filter(Trade.user_id == user_id).one()
+    last_closed = last_closed.timestamp() if last_closed else 0
+    return f"{count}.{last_id or 0}.{active or 0}.{last_closed}"
 
 @app.route('/api/wallet_balance')
 @login_required
 def api_wallet_balance():
     """Get user's current wallet balance"""
-    wallet = Wallet.query.filter_by(user_id=current_user.id).first()
-    logging.info(f"Balance API called for user {current_user.id}")
-    if wallet:
-        balance_data = {
+    updated_at = db.session.query(Wallet.updated_at).filter_by(user_id=current_user.id).scalar()
+    version = updated_at.timestamp() if updated_at else 'none'
+    
+    def build_response():
+        wallet = Wallet.query.filter_by(user_id=current_user.id).first()
+        logging.info(f"Balance API called for user {current_user.id}")
+        if wallet:
+            balance_data = {
+                'success': True,
+                'balance': float(wallet.balance),
+                'demo_balance': float(wallet.demo_balance)
+            }
+            logging.info(f"Returning balance data: {balance_data}")
+            return jsonify(balance_data)
+        
+        logging.warning(f"No wallet found for user {current_user.id}")
+        return jsonify({
             'success': True,
-            'balance': float(wallet.balance),
-            'demo_balance': float(wallet.demo_balance)
-        }
-        logging.info(f"Returning balance data: {balance_data}")
-        return jsonify(balance_data)
+            'balance': 0.00, 
+            'demo_balance': 10000.00
+        })
     
-    logging.warning(f"No wallet found for user {current_user.id}")
-    return jsonify({
-        'success': True,
-        'balance': 0.00, 
-        'demo_balance': 10000.00
-    })
+    return conditional_response(f"wallet-{current_user.id}-{version}", build_response)
 
 @app.route('/api/active_trades')
 @login_required
 def api_active_trades():
     """Get user's active trades"""
-    try:
+    def build_response():
         # Get active trades without processing expired ones first
         active_trades = Trade.query.filter_by(
             user_id=current_user.id,
@@ -919,6 +1062,8 @@ def api_active_trades():
                 'amount': float(trade.amount),
                 'entry_price': float(trade.entry_price),
                 'expiry_time': trade.expiry_time.isoformat(),
+                # Absolute expiry stays valid when the body is revalidated (304)
+                'expiry_timestamp': trade.expiry_time.replace(tzinfo=timezone.utc).timestamp(),
                 'remaining_seconds': max(0, int(remaining_seconds)),
                 'payout_percentage': float(trade.payout_percentage),
                 'created_at': trade.created_at.isoformat(),
@@ -929,6 +1074,10 @@ def api_active_trades():
             'success': True,
             'trades': trades_data
         })
+    
+    try:
+        etag = f"active-{current_user.id}-{trade_version(current_user.id)}"
+        return conditional_response(etag, build_response)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -939,7 +1088,7 @@ def api_active_trades():
 @login_required
 def api_trade_history():
     """Get user's completed trades history"""
-    try:
+    def build_response():
         completed_trades = Trade.query.filter(
             Trade.user_id == current_user.id,
             Trade.status.in_(['won', 'lost', 'cancelled'])
@@ -966,6 +1115,10 @@ def api_trade_history():
             'success': True,
             'trades': trades_data
         })
+    
+    try:
+        etag = f"history-{current_user.id}-{trade_version(current_user.id)}"
+        return conditional_response(etag, build_response)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -974,111 +1127,28 @@ def api_trade_history():
 
 def process_expired_trades_for_user(user_id):
     """Process expired trades for a specific user"""
-    from market_data import RealMarketData
-    
     try:
-        # Get expired trades for this user
-        expired_trades = Trade.query.filter(
-            Trade.user_id == user_id,
-            Trade.status == 'active',
-            Trade.expiry_time <= datetime.utcnow()
-        ).all()
-        
-        if not expired_trades:
-            return
-        
-        market_data = RealMarketData()
-        
-        # Get user and check trade control settings
-        user = User.query.get(user_id)
-        trade_control = user.trade_control if user else 'normal'
-        
-        for trade in expired_trades:
-            try:
-                # Get current price for the asset
-                current_price_data = market_data.get_real_price(trade.asset)
-                
-                # Handle different return formats from market data
-                if current_price_data:
-                    if isinstance(current_price_data, dict) and 'price' in current_price_data:
-                        current_price = float(current_price_data['price'])
-                    elif isinstance(current_price_data, (int, float)):
-                        current_price = float(current_price_data)
-                    else:
-                        # Use fallback price if format is unexpected
-                        current_price = float(trade.entry_price) * (1 + random.uniform(-0.005, 0.005))
-                else:
-                    # Use fallback price if real data unavailable
-                    current_price = float(trade.entry_price) * (1 + random.uniform(-0.005, 0.005))
-                
-                # Set basic trade info
-                trade.exit_price = current_price
-                trade.closed_at = datetime.utcnow()
-                
-                # Apply admin trade control overrides
-                from decimal import Decimal
-                
-                if trade_control == 'always_lose':
-                    # Force trade to lose regardless of market outcome
-                    trade.status = 'lost'
-                    trade.profit_loss = -Decimal(str(trade.amount))
-                elif trade_control == 'always_profit':
-                    # Force trade to win regardless of market outcome
-                    trade.status = 'won'
-                    trade.profit_loss = Decimal(str(trade.amount)) * (Decimal(str(trade.payout_percentage)) / Decimal('100'))
-                else:
-                    # Normal trading - determine win/loss based on market price
-                    if trade.trade_type == 'call':
-                        is_winner = current_price > float(trade.entry_price)
-                    else:  # put
-                        is_winner = current_price < float(trade.entry_price)
-                    
-                    if is_winner:
-                        trade.status = 'won'
-                        trade.profit_loss = Decimal(str(trade.amount)) * (Decimal(str(trade.payout_percentage)) / Decimal('100'))
-                    else:
-                        trade.status = 'lost'
-                        trade.profit_loss = -Decimal(str(trade.amount))
-                
-                # Update user wallet balance
-                wallet = Wallet.query.filter_by(user_id=trade.user_id).first()
-                if wallet:
-                    profit_loss_decimal = Decimal(str(trade.profit_loss))
-                    
-                    if trade.is_demo:
-                        wallet.demo_balance = wallet.demo_balance + profit_loss_decimal
-                    else:
-                        wallet.balance = wallet.balance + profit_loss_decimal
-                    
-                    wallet.updated_at = datetime.utcnow()
-                
-                # Create transaction record
-                if trade.profit_loss > 0:
-                    transaction = Transaction(
-                        user_id=trade.user_id,
-                        transaction_type='trade_win',
-                        amount=trade.profit_loss,
-                        description=f'Won trade: {trade.asset} {trade.trade_type}'
-                    )
-                else:
-                    transaction = Transaction(
-                        user_id=trade.user_id,
-                        transaction_type='trade_loss',
-                        amount=abs(trade.profit_loss),
-                        description=f'Lost trade: {trade.asset} {trade.trade_type}'
-                    )
-                db.session.add(transaction)
-                
-            except Exception as e:
-                print(f"Error processing trade {trade.id}: {e}")
-                continue
-        
-        db.session.commit()
-        print(f"Processed {len(expired_trades)} expired trades for user {user_id}")
-        
+        return settle_due_trades(user_id=user_id)
     except Exception as e:
         print(f"Error processing expired trades for user {user_id}: {e}")
-        db.session.rollback()
+        return 0
+
+def settled_trade_response(trade):
+    """Outcome of a closed trade and the balance it was settled to"""
+    wallet = Wallet.query.filter_by(user_id=trade.user_id).first()
+    return jsonify({
+        'success': True,
+        'trade': {
+            'id': trade.id,
+            'status': trade.status,
+            'profit_loss': float(trade.profit_loss),
+            'exit_price': float(trade.exit_price) if trade.exit_price else None,
+            'asset': trade.asset,
+            'trade_type': trade.trade_type,
+            'amount': float(trade.amount)
+        },
+        'new_balance': float(wallet.demo_balance if trade.is_demo else wallet.balance)
+    })
 
 @app.route('/api/process_expired_trade/<int:trade_id>', methods=['POST'])
 @login_required
@@ -1093,91 +1163,44 @@ def api_process_expired_trade(trade_id):
                 'error': 'Trade not found'
             })
         
-        if trade.status != 'active':
-            return jsonify({
-                'success': False,
-                'error': 'Trade already processed'
-            })
+        if trade.status == 'active':
+            # Allow processing when trade has expired or is about to expire
+            current_time = datetime.utcnow()
+            time_buffer = timedelta(seconds=2)
+            
+            # Allow processing if we're within 2 seconds of expiry time or past it
+            if current_time < (trade.expiry_time - time_buffer):
+                return jsonify({
+                    'success': False,
+                    'error': 'Trade has not expired yet'
+                })
+            
+            # Settle only once the expiry price exists; just before it, ask the
+            # browser to come back instead of settling at the current price
+            if current_time < trade.expiry_time:
+                return jsonify({
+                    'success': False,
+                    'error': 'Trade is being settled',
+                    'retry_after': round((trade.expiry_time - current_time).total_seconds(), 3)
+                })
+            
+            # Does nothing if the expiry scheduler or another worker got there first
+            settle_expired_trades(now=current_time, trade_ids=[trade.id])
         
-        # Allow processing when trade has expired or is about to expire
-        from datetime import datetime, timedelta
-        current_time = datetime.utcnow()
-        time_buffer = timedelta(seconds=2)
+        if trade.status in (WON, LOST):
+            return settled_trade_response(trade)
         
-        # Allow processing if we're within 2 seconds of expiry time or past it
-        if current_time < (trade.expiry_time - time_buffer):
+        if trade.status == 'active':
+            # Claimed by a settlement run that has not committed yet
             return jsonify({
                 'success': False,
-                'error': 'Trade has not expired yet'
+                'error': 'Trade is being settled',
+                'retry_after': 1
             })
         
-        # Use simulated market price instead of real data
-        from utils import generate_market_price
-        current_price = generate_market_price(trade.asset, trade.entry_price)
-        
-        # Calculate trade result
-        trade.exit_price = current_price
-        trade.closed_at = datetime.utcnow()
-        
-        # Check admin control settings first
-        trade_control = current_user.trade_control if current_user else 'normal'
-        from decimal import Decimal
-        
-        if trade_control == 'always_lose':
-            # Force trade to lose regardless of market outcome
-            trade.status = 'lose'
-            trade.profit_loss = -Decimal(str(trade.amount))
-        elif trade_control == 'always_profit':
-            # Force trade to win regardless of market outcome
-            trade.status = 'profit'
-            profit = Decimal(str(trade.amount)) * (Decimal(str(trade.payout_percentage)) / Decimal('100'))
-            trade.profit_loss = profit
-        else:
-            # Normal trading - determine win/loss based on market price
-            if trade.trade_type == 'call':
-                won = current_price > trade.entry_price
-            else:  # put
-                won = current_price < trade.entry_price
-            
-            if won:
-                trade.status = 'profit'
-                profit = Decimal(str(trade.amount)) * (Decimal(str(trade.payout_percentage)) / Decimal('100'))
-                trade.profit_loss = profit
-            else:
-                trade.status = 'lose'
-                trade.profit_loss = -Decimal(str(trade.amount))
-        
-        # Update user balance
-        wallet = current_user.wallet
-        profit_loss_decimal = Decimal(str(trade.profit_loss))
-        
-        if trade.is_demo:
-            wallet.demo_balance = wallet.demo_balance + profit_loss_decimal
-        else:
-            wallet.balance = wallet.balance + profit_loss_decimal
-        
-        # Create transaction record
-        transaction = Transaction()
-        transaction.user_id = current_user.id
-        transaction.transaction_type = 'trade_result'
-        transaction.amount = trade.profit_loss
-        transaction.description = f"Trade {trade.status}: {trade.asset} {trade.trade_type}"
-        transaction.status = 'completed'
-        
-        db.session.add(transaction)
-        db.session.commit()
-        
         return jsonify({
-            'success': True,
-            'trade': {
-                'id': trade.id,
-                'status': trade.status,
-                'profit_loss': float(trade.profit_loss),
-                'asset': trade.asset,
-                'trade_type': trade.trade_type,
-                'amount': float(trade.amount)
-            },
-            'new_balance': float(wallet.demo_balance if trade.is_demo else wallet.balance)
+            'success': False,
+            'error': 'Trade already processed'
         })
         
     except Exception as e:
@@ -17,6 +17,8 @@ from app import app, db
 from models import User, Wallet, AdminSettings
 # Import routes to register them
 import routes  # noqa: F401
+from quote_refresher import start_quote_refresher
+from expiry_scheduler import start_expiry_scheduler
 
 def create_default_users():
     """Create default admin and test users"""
@@ -148,6 +150,18 @@ def main():
             print(f"❌ Database setup failed: {e}")
             sys.exit(1)
     
+    # Background threads run only in the reloader's serving process; the
+    # watcher process would otherwise run a second copy of each
+    serving = os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    
+    # Keep the shared quote snapshot warm in the background
+    if serving and start_quote_refresher():
+        print("✓ Background quote refresher started")
+    
+    # Settle trades as they expire
+    if serving and start_expiry_scheduler():
+        print("✓ Trade expiry scheduler started")
+    
     # Start the Flask application
     print("Starting TradePro server...")
     print("Access the application at: http://localhost:5000")
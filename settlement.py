@@ -0,0 +1,394 @@
+"""
+Trade settlement engine for TradePro
+Closes expired trades in batches: exit prices are looked up once per asset,
+every outcome is decided in one pass, and the trades, wallets and
+transactions are written in a single database transaction.
+
+Each run first claims its trades by writing a claim token into their
+status, so any number of threads and processes can settle at once and
+every trade is credited exactly once. Two modes write the same rows.
+'batch' decides outcomes in Python and returns them; 'sql' stages exit
+prices per asset and tick and settles the whole set in a few statements
+without loading the trades.
+"""
+
+import math
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import (select, update, insert, delete, bindparam, case, and_, or_, cast, extract,
+                        func, literal, true, false, Table, Column, MetaData, String, Integer, BigInteger, Numeric)
+
+from app import app, db
+from models import Trade, User, Wallet, Transaction
+from price_simulator import price_simulator
+from utils import generate_market_price
+
+# Closed trade statuses
+WON = 'won'
+LOST = 'lost'
+
+# Statuses the old per-trade settlement endpoint wrote, and what they mean now
+LEGACY_STATUSES = {'profit': WON, 'lose': LOST}
+
+# Prefix of the status a trade holds while a settlement run owns it
+CLAIM_PREFIX = 'claim:'
+
+CENT = Decimal('0.01')
+
+SETTLEMENT_MODES = ('batch', 'sql')
+
+def partition_filter(partition):
+    """SQL condition selecting one (index, count) partition of users by user_id modulo count"""
+    index, count = partition
+    return Trade.user_id % count == index
+
+def due_backlog(now=None, partition=None):
+    """(number of active trades already expired, oldest such expiry or None)"""
+    query = select(func.count(Trade.id), func.min(Trade.expiry_time)).where(
+        Trade.status == 'active', Trade.expiry_time <= (now or datetime.utcnow()))
+    if partition is not None:
+        query = query.where(partition_filter(partition))
+    count, oldest = db.session.execute(query).one()
+    db.session.rollback()
+    return count, oldest
+
+def claim_expired_trades(now, user_id=None, trade_ids=None, limit=None, partition=None):
+    """Move due trades from 'active' to a fresh claim token; returns (token, trades claimed).
+
+    On PostgreSQL the candidates are selected FOR UPDATE SKIP LOCKED, so
+    concurrent runs claim disjoint sets without waiting on each other. SQLite
+    has no row locks, but the claim UPDATE takes its database write lock until
+    the run commits, which serializes claims. Either way the claim is undone
+    if the run rolls back.
+    """
+    token = CLAIM_PREFIX + uuid.uuid4().hex[:12]
+    candidates = select(Trade.id).where(Trade.status == 'active', Trade.expiry_time <= now)
+    if user_id is not None:
+        candidates = candidates.where(Trade.user_id == user_id)
+    if trade_ids is not None:
+        candidates = candidates.where(Trade.id.in_(trade_ids))
+    if partition is not None:
+        candidates = candidates.where(partition_filter(partition))
+    candidates = candidates.order_by(Trade.expiry_time, Trade.id).limit(limit).with_for_update(skip_locked=True)
+
+    claimed = db.session.execute(
+        update(Trade)
+        .where(Trade.id.in_(candidates), Trade.status == 'active')
+        .values(status=token)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return token, claimed
+
+def claimed_trades_query(token):
+    """Trades held by a claim token, with their owner's trade control setting"""
+    return select(
+        Trade.id, Trade.user_id, Trade.asset, Trade.trade_type, Trade.amount,
+        Trade.entry_price, Trade.payout_percentage, Trade.is_demo, Trade.expiry_time,
+        User.trade_control
+    ).join(User, User.id == Trade.user_id).where(Trade.status == token).order_by(Trade.id)
+
+def exit_prices(trades):
+    """{trade id: exit price}, the simulated price in effect at each trade's expiry.
+
+    Each asset's tick history is searched once for all of its trades. Expiries
+    outside the buffered history settle at the asset's current price.
+    """
+    by_asset = defaultdict(list)
+    for trade in trades:
+        by_asset[trade.asset].append(trade)
+
+    prices = {}
+    for asset, group in by_asset.items():
+        stamps = [t.expiry_time.replace(tzinfo=timezone.utc).timestamp() for t in group]
+        fallback = None
+        missing = 0
+        for trade, price in zip(group, price_simulator.prices_at(asset, stamps).tolist()):
+            if price != price:  # NaN
+                if fallback is None:
+                    fallback = generate_market_price(asset)
+                price = fallback
+                missing += 1
+            prices[trade.id] = round(price, 5)
+        if missing:
+            print(f"No simulated {asset} price at expiry for {missing} trades; settling them at the current price")
+    return prices
+
+def trade_won(trade_type, entry_price, exit_price, trade_control='normal'):
+    """Whether a trade won; the admin trade control setting overrides the market"""
+    if trade_control == 'always_lose':
+        return False
+    if trade_control == 'always_profit':
+        return True
+    exit_price = Decimal(str(exit_price))
+    if trade_type == 'call':
+        return exit_price > entry_price
+    return exit_price < entry_price
+
+def settle_expired_trades(now=None, user_id=None, trade_ids=None, limit=None, partition=None):
+    """Settle the active trades that expired by `now` (naive UTC).
+
+    The stake was taken from the wallet when the trade was placed, so a win
+    credits stake plus payout and a loss moves no money. Optionally limited
+    to one user's trades, to specific trade ids, to one partition of users
+    (see partition_filter) or to the `limit` earliest expiries. Trades
+    another run has claimed are skipped. Returns one result dict per
+    settled trade.
+    """
+    try:
+        token, claimed = claim_expired_trades(now or datetime.utcnow(), user_id, trade_ids, limit, partition)
+        if not claimed:
+            db.session.rollback()
+            return []
+        results, assets = _settle_claimed(token)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    won_count = sum(1 for r in results if r['status'] == WON)
+    print(f"Settled {len(results)} expired trades ({won_count} won, {len(results) - won_count} lost) "
+          f"across {assets} assets")
+    return results
+
+def _settle_claimed(token):
+    trades = db.session.execute(claimed_trades_query(token)).all()
+    prices = exit_prices(trades)
+    closed_at = datetime.utcnow()
+
+    trade_rows = []
+    transaction_rows = []
+    credits = defaultdict(lambda: {'credit': Decimal('0'), 'demo_credit': Decimal('0')})
+    results = []
+    for trade in trades:
+        exit_price = prices[trade.id]
+        amount = Decimal(str(trade.amount))
+        won = trade_won(trade.trade_type, Decimal(str(trade.entry_price)), exit_price,
+                        trade.trade_control or 'normal')
+
+        if won:
+            profit_loss = (amount * Decimal(str(trade.payout_percentage)) / 100).quantize(CENT)
+            payout = amount + profit_loss
+            credits[trade.user_id]['demo_credit' if trade.is_demo else 'credit'] += payout
+            transaction_rows.append({
+                'user_id': trade.user_id,
+                'transaction_type': 'trade_win',
+                'amount': payout,
+                'description': f'Won trade: {trade.asset} {trade.trade_type.upper()}',
+                'status': 'completed',
+                'created_at': closed_at
+            })
+        else:
+            profit_loss = -amount
+
+        status = WON if won else LOST
+        trade_rows.append({
+            'id': trade.id,
+            'status': status,
+            'exit_price': exit_price,
+            'profit_loss': profit_loss,
+            'closed_at': closed_at
+        })
+        results.append({
+            'id': trade.id,
+            'user_id': trade.user_id,
+            'asset': trade.asset,
+            'trade_type': trade.trade_type,
+            'amount': float(amount),
+            'is_demo': trade.is_demo,
+            'status': status,
+            'exit_price': exit_price,
+            'profit_loss': float(profit_loss)
+        })
+
+    wallet_rows = [
+        {'wallet_user_id': uid, 'credit': c['credit'], 'demo_credit': c['demo_credit']}
+        for uid, c in credits.items()
+    ]
+    wallets = Wallet.__table__
+
+    db.session.execute(update(Trade), trade_rows)
+    if wallet_rows:
+        db.session.execute(
+            update(wallets)
+            .where(wallets.c.user_id == bindparam('wallet_user_id'))
+            .values(balance=wallets.c.balance + bindparam('credit'),
+                    demo_balance=wallets.c.demo_balance + bindparam('demo_credit'),
+                    updated_at=closed_at),
+            wallet_rows
+        )
+    if transaction_rows:
+        db.session.execute(insert(Transaction), transaction_rows)
+    return results, len(set(t.asset for t in trades))
+
+# Exit price per (asset, simulator tick) for set-based settlement
+_staged_prices = Table(
+    'settlement_prices', MetaData(),
+    Column('asset', String(20), primary_key=True),
+    Column('tick', BigInteger, primary_key=True),
+    Column('price', Numeric(10, 5), nullable=False),
+    prefixes=['TEMPORARY']
+)
+
+def expiry_tick(dialect_name, tick_seconds):
+    """SQL expression for the simulator tick a trade expires in (floor(epoch / tick_seconds))"""
+    if dialect_name == 'sqlite':
+        seconds = cast(func.strftime('%s', Trade.expiry_time), Integer)
+        return cast(seconds / tick_seconds, BigInteger)
+    return cast(func.floor(extract('epoch', Trade.expiry_time) / tick_seconds), BigInteger)
+
+def _stage_prices(connection, spans, tick_seconds):
+    """Fill the staging table with the exit price for every tick each asset's trades expire in.
+
+    spans is {asset: (first tick, last tick)} over that asset's due trades.
+    Returns the (lowest, highest) tick that has its own row; trades outside
+    it are clamped onto those edge rows, which hold the current price.
+    """
+    _staged_prices.create(connection, checkfirst=True)
+    connection.execute(delete(_staged_prices))
+
+    buffered = price_simulator.tick_span()
+    low, high = (buffered[0] - 1, buffered[1] + 1) if buffered else (0, 0)
+    rows = []
+    for asset, (first, last) in spans.items():
+        ticks = np.arange(min(max(first, low), high), max(min(last, high), low) + 1)
+        prices = price_simulator.prices_at(asset, ticks * tick_seconds)
+        # spans are padded by one tick each side, so only a range reaching past
+        # the padding holds expiries without a buffered price
+        if first + 1 <= low or last - 1 >= high or np.isnan(prices[1:-1]).any():
+            print(f"No simulated {asset} price for some expiries between ticks {first + 1} and {last - 1}; "
+                  f"settling those at the current price")
+        fallback = None
+        for tick, price in zip(ticks.tolist(), prices.tolist()):
+            if price != price or tick in (low, high):  # NaN, or an edge row
+                if fallback is None:
+                    fallback = generate_market_price(asset)
+                price = fallback
+            rows.append({'asset': asset, 'tick': tick, 'price': round(price, 5)})
+    if rows:
+        connection.execute(insert(_staged_prices), rows)
+    return low, high
+
+def settle_expired_trades_in_sql(now=None, user_id=None, trade_ids=None, limit=None, partition=None):
+    """Set-based settle_expired_trades(): same outcomes, returns only the number settled.
+
+    After claiming, stages exit prices per asset and tick, then runs one
+    UPDATE over the claimed trades joined to them, one grouped UPDATE over
+    wallets, one INSERT ... SELECT into transactions and one UPDATE that
+    releases the claim, all in one transaction. Works on PostgreSQL and
+    SQLite (3.33+ for UPDATE ... FROM).
+    """
+    try:
+        token, claimed = claim_expired_trades(now or datetime.utcnow(), user_id, trade_ids, limit, partition)
+        if not claimed:
+            db.session.rollback()
+            return 0
+        assets = _settle_claimed_in_sql(token, claimed)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    print(f"Settled {claimed} expired trades in SQL across {assets} assets")
+    return claimed
+
+def _settle_claimed_in_sql(token, claimed_count):
+    claimed = Trade.status == token
+    tick_seconds = price_simulator.tick_seconds
+    spans = {
+        asset: (math.floor(first.replace(tzinfo=timezone.utc).timestamp() / tick_seconds) - 1,
+                math.floor(last.replace(tzinfo=timezone.utc).timestamp() / tick_seconds) + 1)
+        for asset, first, last in db.session.execute(
+            select(Trade.asset, func.min(Trade.expiry_time), func.max(Trade.expiry_time))
+            .where(claimed).group_by(Trade.asset)
+        )
+    }
+
+    closed_at = datetime.utcnow()
+    prices = _staged_prices.c
+    wallets = Wallet.__table__
+    connection = db.session.connection()
+    low, high = _stage_prices(connection, spans, tick_seconds)
+
+    # The claim stays in place until the last statement; a win is any
+    # priced trade whose P/L came out non-negative (a loss is minus the stake)
+    tick = expiry_tick(connection.dialect.name, tick_seconds)
+    won = case(
+        (User.trade_control == 'always_lose', false()),
+        (User.trade_control == 'always_profit', true()),
+        else_=or_(and_(Trade.trade_type == 'call', prices.price > Trade.entry_price),
+                  and_(Trade.trade_type != 'call', prices.price < Trade.entry_price))
+    )
+    priced = db.session.execute(
+        update(Trade)
+        .where(claimed, User.id == Trade.user_id, prices.asset == Trade.asset,
+               prices.tick == case((tick < low, low), (tick > high, high), else_=tick))
+        .values(exit_price=prices.price,
+                profit_loss=case((won, func.round(Trade.amount * Trade.payout_percentage / 100, 2)),
+                                 else_=-Trade.amount),
+                closed_at=closed_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    # A trade the join missed still holds its default P/L of 0; settling it
+    # would pay it out as a win, so undo the whole run instead
+    if priced != claimed_count:
+        raise RuntimeError(f"Priced {priced} of {claimed_count} claimed trades; settlement rolled back")
+
+    has_won = and_(Trade.exit_price.isnot(None), Trade.profit_loss >= 0)
+    wins = [claimed, has_won]
+    payout = Trade.amount + Trade.profit_loss
+    credits = select(
+        Trade.user_id,
+        func.sum(case((Trade.is_demo, 0), else_=payout)).label('credit'),
+        func.sum(case((Trade.is_demo, payout), else_=0)).label('demo_credit')
+    ).where(*wins).group_by(Trade.user_id).subquery()
+    db.session.execute(
+        update(wallets)
+        .where(wallets.c.user_id == credits.c.user_id)
+        .values(balance=wallets.c.balance + credits.c.credit,
+                demo_balance=wallets.c.demo_balance + credits.c.demo_credit,
+                updated_at=closed_at)
+    )
+    db.session.execute(
+        insert(Transaction).from_select(
+            ['user_id', 'transaction_type', 'amount', 'description', 'status', 'created_at'],
+            select(Trade.user_id, literal('trade_win'), payout,
+                   literal('Won trade: ') + Trade.asset + literal(' ') + func.upper(Trade.trade_type),
+                   literal('completed'), literal(closed_at))
+            .where(*wins)
+        )
+    )
+    db.session.execute(
+        update(Trade)
+        .where(claimed)
+        .values(status=case((has_won, WON), else_=LOST))
+        .execution_options(synchronize_session=False)
+    )
+    return len(spans)
+
+def settle_due_trades(now=None, user_id=None, trade_ids=None, limit=None, partition=None, mode=None):
+    """Settle expired trades with SETTLEMENT_MODE ('batch' or 'sql'); returns the number settled"""
+    mode = mode or os.environ.get('SETTLEMENT_MODE', 'batch')
+    if mode == 'sql':
+        return settle_expired_trades_in_sql(now, user_id, trade_ids, limit, partition)
+    return len(settle_expired_trades(now, user_id, trade_ids, limit, partition))
+
+def migrate_legacy_statuses():
+    """Rewrite trades stored as 'profit'/'lose' to won/lost; returns how many changed"""
+    changed = 0
+    for legacy, status in LEGACY_STATUSES.items():
+        changed += db.session.execute(
+            update(Trade).where(Trade.status == legacy).values(status=status)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    db.session.commit()
+    return changed
+
+@app.cli.command('migrate-trade-statuses')
+def migrate_trade_statuses_command():
+    """One-off data migration: legacy 'profit'/'lose' trade statuses to won/lost"""
+    print(f"Migrated {migrate_legacy_statuses()} trades to won/lost statuses")
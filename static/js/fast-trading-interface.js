@@ -289,51 +289,58 @@ class FastTradingInterface {
         // Store the current live price separately from candle data
         this.livePrice = null;
         
-        // Update with real market data every 2 seconds for more responsive updates
-        setInterval(async () => {
-            try {
-                const response = await fetch(`/api/market-data-new/${this.currentAsset}`);
-                const marketInfo = await response.json();
+        const applyMarketInfo = (marketInfo) => {
+            if (marketInfo.price) {
+                // Store live price for immediate display
+                this.livePrice = marketInfo.price;
                 
-                if (marketInfo.price) {
-                    // Store live price for immediate display
-                    this.livePrice = marketInfo.price;
-                    
-                    const currentTime = new Date();
-                    const lastCandle = this.data[this.data.length - 1];
-                    
-                    // Check if we need a new candle based on timeframe
-                    const timeDiff = currentTime.getTime() - lastCandle.time.getTime();
-                    const intervalMs = this.getIntervalMs();
+                const currentTime = new Date();
+                const lastCandle = this.data[this.data.length - 1];
+                
+                // Check if we need a new candle based on timeframe
+                const timeDiff = currentTime.getTime() - lastCandle.time.getTime();
+                const intervalMs = this.getIntervalMs();
+                
+                if (timeDiff >= intervalMs) {
+                    // Create new candle
+                    this.data.push({
+                        time: currentTime,
+                        open: lastCandle.close,
+                        high: Math.max(lastCandle.close, marketInfo.price),
+                        low: Math.min(lastCandle.close, marketInfo.price),
+                        close: marketInfo.price
+                    });
                     
-                    if (timeDiff >= intervalMs) {
-                        // Create new candle
-                        this.data.push({
-                            time: currentTime,
-                            open: lastCandle.close,
-                            high: Math.max(lastCandle.close, marketInfo.price),
-                            low: Math.min(lastCandle.close, marketInfo.price),
-                            close: marketInfo.price
-                        });
-                        
-                        // Keep data within limits
-                        const maxDataPoints = this.getDataPointsForTimeframe() * 2;
-                        if (this.data.length > maxDataPoints) {
-                            this.data.shift();
-                        }
-                    } else {
-                        // Update current candle with live price
-                        lastCandle.close = marketInfo.price;
-                        lastCandle.high = Math.max(lastCandle.high, marketInfo.price);
-                        lastCandle.low = Math.min(lastCandle.low, marketInfo.price);
+                    // Keep data within limits
+                    const maxDataPoints = this.getDataPointsForTimeframe() * 2;
+                    if (this.data.length > maxDataPoints) {
+                        this.data.shift();
                     }
-                    
-                    this.updatePriceDisplay(marketInfo.price);
+                } else {
+                    // Update current candle with live price
+                    lastCandle.close = marketInfo.price;
+                    lastCandle.high = Math.max(lastCandle.high, marketInfo.price);
+                    lastCandle.low = Math.min(lastCandle.low, marketInfo.price);
                 }
-            } catch (error) {
-                console.error('Error updating real-time data:', error);
+                
+                this.updatePriceDisplay(marketInfo.price);
             }
-        }, 2000);
+        };
+        
+        // Live prices are pushed over the shared price stream
+        if (window.PriceStream) {
+            window.PriceStream.subscribe(() => this.currentAsset, applyMarketInfo);
+        } else {
+            // Poll real market data every 2 seconds
+            setInterval(async () => {
+                try {
+                    const response = await fetch(`/api/market-data-new/${this.currentAsset}`);
+                    applyMarketInfo(await response.json());
+                } catch (error) {
+                    console.error('Error updating real-time data:', error);
+                }
+            }, 2000);
+        }
         
         // Add faster visual updates for smoother live price movement
         setInterval(() => {
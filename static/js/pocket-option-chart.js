@@ -500,10 +500,17 @@ class PocketOptionChart {
             this.updateLastUpdateTime();
         }, 5000);
         
-        // Update current price every 2 seconds
-        setInterval(() => {
-            this.updateRealTimePrice();
-        }, 2000);
+        if (window.PriceStream) {
+            // Live prices are pushed over the shared price stream
+            window.PriceStream.subscribe(() => this.currentAsset, data => {
+                this.updatePriceDisplay(data.price, data.change_percent || 0);
+            });
+        } else {
+            // Update current price every 2 seconds
+            setInterval(() => {
+                this.updateRealTimePrice();
+            }, 2000);
+        }
     }
     
     async addNewDataPoint() {
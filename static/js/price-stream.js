@@ -0,0 +1,127 @@
+// Shared live price feed
+// One EventSource per page (/api/stream/prices) serves every subscriber.
+// Falls back to polling /api/market-data-new when EventSource is unavailable,
+// the server has no stream slot free, or the stream keeps failing.
+
+(function() {
+    if (window.PriceStream) {
+        return;
+    }
+
+    const POLL_INTERVAL_MS = 2000;
+    const MAX_STREAM_FAILURES = 3;
+
+    const subscribers = new Set();
+    let source = null;
+    let pollTimer = null;
+    let activeSymbols = '';
+    let failures = 0;
+
+    function wantedSymbols() {
+        const symbols = new Set();
+        subscribers.forEach(sub => {
+            const symbol = sub.getSymbol();
+            if (symbol) {
+                symbols.add(symbol);
+            }
+        });
+        return Array.from(symbols).sort().join(',');
+    }
+
+    function dispatch(data) {
+        subscribers.forEach(sub => {
+            if (sub.getSymbol() === data.symbol) {
+                try {
+                    sub.callback(data);
+                } catch (error) {
+                    console.error('Price subscriber error:', error);
+                }
+            }
+        });
+    }
+
+    function stop() {
+        if (source) {
+            source.close();
+            source = null;
+        }
+        if (pollTimer) {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+    }
+
+    function startPolling(symbols) {
+        const poll = () => {
+            symbols.split(',').forEach(async symbol => {
+                try {
+                    const response = await fetch(`/api/market-data-new/${symbol}`);
+                    const data = await response.json();
+                    if (data.price) {
+                        dispatch(data);
+                    }
+                } catch (error) {
+                    // Keep polling; the next round may succeed
+                }
+            });
+        };
+        poll();
+        pollTimer = setInterval(poll, POLL_INTERVAL_MS);
+    }
+
+    function startStream(symbols) {
+        source = new EventSource(`/api/stream/prices?symbols=${encodeURIComponent(symbols)}`);
+        source.addEventListener('price', event => {
+            failures = 0;
+            dispatch(JSON.parse(event.data));
+        });
+        source.onerror = () => {
+            // EventSource reconnects by itself unless the server refused the
+            // stream (e.g. 503 when full); give up after repeated failures
+            failures += 1;
+            if (source.readyState === EventSource.CLOSED) {
+                failures = MAX_STREAM_FAILURES;
+            }
+            if (failures >= MAX_STREAM_FAILURES) {
+                console.warn('Price stream unavailable, falling back to polling');
+                stop();
+                startPolling(symbols);
+            }
+        };
+    }
+
+    // (Re)connect when the set of subscribed symbols changes
+    function sync() {
+        const symbols = wantedSymbols();
+        if (symbols === activeSymbols) {
+            return;
+        }
+        stop();
+        activeSymbols = symbols;
+        if (!symbols) {
+            return;
+        }
+        if (window.EventSource && failures < MAX_STREAM_FAILURES) {
+            startStream(symbols);
+        } else {
+            startPolling(symbols);
+        }
+    }
+
+    // Components switch assets by changing their own state; follow them
+    setInterval(sync, 1000);
+
+    window.PriceStream = {
+        // getSymbol() returns the subscriber's current symbol; callback(data)
+        // receives {symbol, price, change, change_percent, timestamp}
+        subscribe(getSymbol, callback) {
+            const sub = { getSymbol, callback };
+            subscribers.add(sub);
+            sync();
+            return () => {
+                subscribers.delete(sub);
+                sync();
+            };
+        }
+    };
+})();
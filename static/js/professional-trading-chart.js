@@ -812,10 +812,15 @@ class ProfessionalTradingChart {
     }
     
     startRealTimeUpdates() {
-        // Update chart every 5 seconds
-        setInterval(() => {
-            this.addNewDataPoint();
-        }, 5000);
+        if (window.PriceStream) {
+            // Live prices are pushed over the shared price stream
+            window.PriceStream.subscribe(() => this.currentAsset, data => this.applyPriceUpdate(data));
+        } else {
+            // Update chart every 5 seconds
+            setInterval(() => {
+                this.addNewDataPoint();
+            }, 5000);
+        }
         
         // Update timer every second
         setInterval(() => {
@@ -826,44 +831,46 @@ class ProfessionalTradingChart {
     async addNewDataPoint() {
         try {
             const response = await fetch(`/api/market-data-new/${this.currentAsset}`);
-            const data = await response.json();
-            
-            if (data.price) {
-                const now = new Date();
-                const lastCandle = this.data[this.data.length - 1];
-                
-                // Update last candle or create new one
-                const timeDiff = now - lastCandle.time;
-                
-                if (timeDiff >= 60000) { // New minute
-                    this.data.push({
-                        time: now,
-                        open: lastCandle.close,
-                        high: data.price,
-                        low: data.price,
-                        close: data.price,
-                        volume: 0
-                    });
-                } else {
-                    // Update current candle
-                    lastCandle.close = data.price;
-                    lastCandle.high = Math.max(lastCandle.high, data.price);
-                    lastCandle.low = Math.min(lastCandle.low, data.price);
-                }
-                
-                // Keep last 100 candles
-                if (this.data.length > 100) {
-                    this.data.shift();
-                }
-                
-                this.renderChart();
-                this.updatePriceInfo();
-            }
+            this.applyPriceUpdate(await response.json());
         } catch (error) {
             console.error('Error updating price:', error);
         }
     }
     
+    applyPriceUpdate(data) {
+        if (data.price) {
+            const now = new Date();
+            const lastCandle = this.data[this.data.length - 1];
+            
+            // Update last candle or create new one
+            const timeDiff = now - lastCandle.time;
+            
+            if (timeDiff >= 60000) { // New minute
+                this.data.push({
+                    time: now,
+                    open: lastCandle.close,
+                    high: data.price,
+                    low: data.price,
+                    close: data.price,
+                    volume: 0
+                });
+            } else {
+                // Update current candle
+                lastCandle.close = data.price;
+                lastCandle.high = Math.max(lastCandle.high, data.price);
+                lastCandle.low = Math.min(lastCandle.low, data.price);
+            }
+            
+            // Keep last 100 candles
+            if (this.data.length > 100) {
+                this.data.shift();
+            }
+            
+            this.renderChart();
+            this.updatePriceInfo();
+        }
+    }
+    
     updateTimer() {
         // Update the main timer display
         const now = new Date();
@@ -221,7 +221,7 @@ class SimpleTradingInterface {
             const tradeElement = document.createElement('div');
             tradeElement.style.cssText = 'background: #444; margin-bottom: 10px; padding: 15px; border-radius: 8px; border-left: 3px solid ' + (trade.trade_type === 'call' ? '#26a69a' : '#ef5350');
             
-            const remainingTime = this.formatTime(trade.remaining_seconds);
+            const remainingTime = this.formatTime(this.remainingSeconds(trade));
             const potentialProfit = (trade.amount * trade.payout_percentage / 100).toFixed(2);
             
             tradeElement.innerHTML = `
@@ -249,14 +249,24 @@ class SimpleTradingInterface {
         });
     }
     
+    remainingSeconds(trade) {
+        // Derive from the absolute expiry so a revalidated (304) response
+        // still counts down correctly; remaining_seconds is as of when the
+        // server built the body
+        if (trade.expiry_timestamp) {
+            return Math.max(0, Math.floor(trade.expiry_timestamp - Date.now() / 1000));
+        }
+        return Math.max(0, Math.floor(trade.remaining_seconds));
+    }
+    
     startTradeTimers(trades) {
         // Clear existing timers
         this.tradeTimers.forEach(timer => clearInterval(timer));
         this.tradeTimers = [];
         
         trades.forEach(trade => {
-            if (trade.remaining_seconds > 0) {
-                let remainingSeconds = trade.remaining_seconds;
+            if (this.remainingSeconds(trade) > 0) {
+                let remainingSeconds = this.remainingSeconds(trade);
                 
                 const timer = setInterval(async () => {
                     remainingSeconds--;
@@ -291,7 +301,7 @@ class SimpleTradingInterface {
         }
     }
     
-    async processExpiredTrade(tradeId) {
+    async processExpiredTrade(tradeId, attempt = 0) {
         try {
             const response = await fetch(`/api/process_expired_trade/${tradeId}`, {
                 method: 'POST',
@@ -320,6 +330,9 @@ class SimpleTradingInterface {
                     // Update balance and refresh trades
                     this.loadWalletBalance();
                     setTimeout(() => this.loadActiveTrades(), 1000);
+                } else if (result.retry_after !== undefined && attempt < 5) {
+                    // Expiry not reached on the server clock yet, or settlement in progress
+                    setTimeout(() => this.processExpiredTrade(tradeId, attempt + 1), result.retry_after * 1000 + 250);
                 }
             }
         } catch (error) {
@@ -295,6 +295,18 @@ class SimpleTradingView {
     }
     
     startPriceUpdates() {
+        if (window.PriceStream) {
+            // Live prices are pushed over the shared price stream
+            window.PriceStream.subscribe(() => this.currentAsset, data => {
+                const priceDisplay = document.getElementById('price-display');
+                if (priceDisplay && data.price) {
+                    priceDisplay.textContent = data.price.toFixed(5);
+                    priceDisplay.style.color = data.change >= 0 ? '#4CAF50' : '#f44336';
+                }
+            });
+            return;
+        }
+        
         setInterval(async () => {
             try {
                 const response = await fetch(`/api/market-data-new/${this.currentAsset}`);
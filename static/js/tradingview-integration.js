@@ -707,22 +707,32 @@ class TradingViewChart {
     }
     
     startPriceUpdates() {
+        const showPrice = (data) => {
+            if (data.price) {
+                const priceDisplay = document.getElementById('price-display');
+                if (priceDisplay) {
+                    const changePercent = data.change_percent || 0;
+                    const color = changePercent >= 0 ? '#26a69a' : '#ef5350';
+                    
+                    priceDisplay.textContent = `${data.price.toFixed(5)}`;
+                    priceDisplay.style.color = color;
+                }
+            }
+        };
+        
+        // Live prices are pushed over the shared price stream
+        if (window.PriceStream) {
+            if (!this.priceStreamUnsubscribe) {
+                this.priceStreamUnsubscribe = window.PriceStream.subscribe(() => this.currentAsset, showPrice);
+            }
+            return;
+        }
+        
         // Update price display with real market data
         setInterval(async () => {
             try {
                 const response = await fetch(`/api/market-data-new/${this.currentAsset}`);
-                const data = await response.json();
-                
-                if (data.price) {
-                    const priceDisplay = document.getElementById('price-display');
-                    if (priceDisplay) {
-                        const changePercent = data.change_percent || 0;
-                        const color = changePercent >= 0 ? '#26a69a' : '#ef5350';
-                        
-                        priceDisplay.textContent = `${data.price.toFixed(5)}`;
-                        priceDisplay.style.color = color;
-                    }
-                }
+                showPrice(await response.json());
             } catch (error) {
                 // Continue silently - price display is optional
             }
@@ -986,7 +996,7 @@ class TradingViewChart {
             tradeElement.id = `trade-${trade.id}`;
             tradeElement.style.cssText = 'background: #2a2e39; padding: 12px; border-radius: 4px; margin-bottom: 8px; border-left: 3px solid ' + (trade.trade_type === 'call' ? '#26a69a' : '#ef5350') + ';';
             
-            const remainingTime = this.formatTime(trade.remaining_seconds);
+            const remainingTime = this.formatTime(this.remainingSeconds(trade));
             const potentialProfit = (trade.amount * trade.payout_percentage / 100).toFixed(2);
             
             tradeElement.innerHTML = `
@@ -1018,6 +1028,16 @@ class TradingViewChart {
         });
     }
     
+    remainingSeconds(trade) {
+        // Derive from the absolute expiry so a revalidated (304) response
+        // still counts down correctly; remaining_seconds is as of when the
+        // server built the body
+        if (trade.expiry_timestamp) {
+            return Math.max(0, Math.floor(trade.expiry_timestamp - Date.now() / 1000));
+        }
+        return Math.max(0, Math.floor(trade.remaining_seconds));
+    }
+    
     startTradeTimers(trades) {
         // Clear existing timers
         if (this.tradeTimers) {
@@ -1026,9 +1046,9 @@ class TradingViewChart {
         this.tradeTimers = [];
         
         trades.forEach(trade => {
-            if (trade.remaining_seconds > 0) {
+            if (this.remainingSeconds(trade) > 0) {
                 // Store the initial remaining seconds for countdown
-                let remainingSeconds = Math.max(0, Math.floor(trade.remaining_seconds));
+                let remainingSeconds = this.remainingSeconds(trade);
                 
                 // Update immediately
                 this.updateTradeTimerWithSeconds(trade.id, remainingSeconds);
@@ -1137,11 +1157,11 @@ class TradingViewChart {
             .catch(error => console.error('Error loading wallet balance (third function):', error));
     }
     
-    async processExpiredTrade(tradeId) {
+    async processExpiredTrade(tradeId, attempt = 0) {
         try {
             // Immediately remove from active trades display
             const tradeElement = document.getElementById(`trade-${tradeId}`);
-            if (tradeElement) {
+            if (tradeElement && attempt === 0) {
                 tradeElement.style.background = '#34495e';
                 tradeElement.style.border = '2px solid #f39c12';
                 
@@ -1182,19 +1202,24 @@ class TradingViewChart {
                     const profitLoss = result.trade?.profit_loss || 0;
                     const tradeStatus = result.trade?.status;
                     let notificationMessage;
-                    if (tradeStatus === 'profit') {
+                    if (tradeStatus === 'won' || tradeStatus === 'profit') {
                         notificationMessage = `Trade PROFIT! +$${profitLoss.toFixed(2)}`;
                     } else {
                         const lossAmount = Math.abs(profitLoss);
                         notificationMessage = `Trade LOSS! You lost $${lossAmount.toFixed(2)}`;
                     }
                     this.showTradeMessage(notificationMessage, 
-                        result.trade_result === 'profit' || result.trade_result === 'won' ? 'success' : 'error');
+                        tradeStatus === 'won' || tradeStatus === 'profit' ? 'success' : 'error');
                         
                     // Refresh trades list after short delay
                     setTimeout(() => {
                         this.loadActiveTrades();
                     }, 1000);
+                } else if (result.retry_after !== undefined && attempt < 5) {
+                    // Expiry not reached on the server clock yet, or settlement in progress
+                    setTimeout(() => {
+                        this.processExpiredTrade(tradeId, attempt + 1);
+                    }, result.retry_after * 1000 + 250);
                 } else {
                     console.error('Failed to process expired trade:', result.error);
                     // Re-enable trade element if processing failed
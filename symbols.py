@@ -0,0 +1,94 @@
+"""
+Symbol registry for TradePro
+Single immutable source of per-symbol metadata: provider tickers, asset
+class, simulation parameters, payout base and trading limits. Built once at
+import; every lookup is a dict access.
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+
+SymbolInfo = namedtuple('SymbolInfo', [
+    'symbol',        # our symbol, e.g. 'EURUSD'
+    'name',          # long display name
+    'label',         # short label used in forms
+    'asset_class',   # forex, crypto, index, commodity
+    'yahoo',         # Yahoo Finance ticker (None if not quoted there)
+    'twelve_data',   # Twelve Data symbol
+    'base_price',    # typical price for simulation and fallbacks
+    'volatility',    # per-tick relative volatility for simulation
+    'payout_base',   # base payout percentage (None if not tradable)
+    'min_trade',
+    'max_trade',
+    'listed'         # offered in the trade form and asset list
+])
+
+_RECORDS = (
+    # Forex
+    SymbolInfo('EURUSD', 'Euro / US Dollar', 'EUR/USD', 'forex', 'EURUSD=X', 'EUR/USD', 1.0850, 0.001, 85.0, 1, 5000, True),
+    SymbolInfo('GBPUSD', 'British Pound / US Dollar', 'GBP/USD', 'forex', 'GBPUSD=X', 'GBP/USD', 1.2650, 0.0015, 83.0, 1, 5000, True),
+    SymbolInfo('USDJPY', 'US Dollar / Japanese Yen', 'USD/JPY', 'forex', 'USDJPY=X', 'USD/JPY', 149.50, 0.002, 84.0, 1, 5000, True),
+    SymbolInfo('USDCAD', 'US Dollar / Canadian Dollar', 'USD/CAD', 'forex', 'USDCAD=X', 'USD/CAD', 1.3600, 0.001, 82.0, 1, 5000, False),
+    SymbolInfo('AUDUSD', 'Australian Dollar / US Dollar', 'AUD/USD', 'forex', 'AUDUSD=X', 'AUD/USD', 0.6600, 0.0015, 81.0, 1, 5000, False),
+    SymbolInfo('NZDUSD', 'New Zealand Dollar / US Dollar', 'NZD/USD', 'forex', None, 'NZD/USD', 0.6100, 0.0015, None, 1, 5000, False),
+    SymbolInfo('USDCHF', 'US Dollar / Swiss Franc', 'USD/CHF', 'forex', None, 'USD/CHF', 0.8800, 0.001, None, 1, 5000, False),
+    SymbolInfo('EURGBP', 'Euro / British Pound', 'EUR/GBP', 'forex', None, 'EUR/GBP', 0.8600, 0.001, None, 1, 5000, False),
+    SymbolInfo('EURJPY', 'Euro / Japanese Yen', 'EUR/JPY', 'forex', None, 'EUR/JPY', 162.00, 0.002, None, 1, 5000, False),
+    SymbolInfo('GBPJPY', 'British Pound / Japanese Yen', 'GBP/JPY', 'forex', None, 'GBP/JPY', 189.00, 0.002, None, 1, 5000, False),
+    
+    # Cryptocurrencies
+    SymbolInfo('BTCUSD', 'Bitcoin / US Dollar', 'BTC/USD', 'crypto', 'BTC-USD', 'BTC/USD', 45000.00, 0.02, 78.0, 5, 10000, True),
+    SymbolInfo('ETHUSD', 'Ethereum / US Dollar', 'ETH/USD', 'crypto', 'ETH-USD', 'ETH/USD', 2800.00, 0.025, 76.0, 5, 10000, True),
+    SymbolInfo('ADAUSD', 'Cardano / US Dollar', 'ADA/USD', 'crypto', 'ADA-USD', 'ADA/USD', 0.45, 0.03, 75.0, 5, 10000, False),
+    SymbolInfo('DOTUSD', 'Polkadot / US Dollar', 'DOT/USD', 'crypto', 'DOT-USD', 'DOT/USD', 7.00, 0.03, 74.0, 5, 10000, False),
+    SymbolInfo('LTCUSD', 'Litecoin / US Dollar', 'LTC/USD', 'crypto', None, 'LTC/USD', 70.00, 0.025, None, 5, 10000, False),
+    SymbolInfo('XRPUSD', 'Ripple / US Dollar', 'XRP/USD', 'crypto', None, 'XRP/USD', 0.55, 0.03, None, 5, 10000, False),
+    SymbolInfo('LINKUSD', 'Chainlink / US Dollar', 'LINK/USD', 'crypto', None, 'LINK/USD', 14.00, 0.03, None, 5, 10000, False),
+    SymbolInfo('BCHUSD', 'Bitcoin Cash / US Dollar', 'BCH/USD', 'crypto', None, 'BCH/USD', 240.00, 0.025, None, 5, 10000, False),
+    
+    # Stock indices
+    SymbolInfo('SPX500', 'S&P 500', 'S&P 500', 'index', '^GSPC', 'SPX', 4750.00, 0.008, 82.0, 10, 8000, False),
+    SymbolInfo('NASDAQ', 'NASDAQ Composite', 'NASDAQ', 'index', '^IXIC', 'IXIC', 15200.00, 0.01, 81.0, 10, 8000, False),
+    SymbolInfo('DOW', 'Dow Jones Industrial Average', 'Dow Jones', 'index', '^DJI', 'DJI', 37500.00, 0.008, 83.0, 10, 8000, False),
+    SymbolInfo('FTSE', 'FTSE 100', 'FTSE 100', 'index', None, 'UKX', 7600.00, 0.008, None, 10, 8000, False),
+    SymbolInfo('DAX', 'DAX 40', 'DAX', 'index', None, 'DAX', 16700.00, 0.008, None, 10, 8000, False),
+    SymbolInfo('NIKKEI', 'Nikkei 225', 'Nikkei 225', 'index', None, 'N225', 33500.00, 0.01, None, 10, 8000, False),
+    
+    # Commodities
+    SymbolInfo('XAUUSD', 'Gold / US Dollar', 'Gold/USD', 'commodity', 'GC=F', 'XAU/USD', 2050.00, 0.01, 80.0, 10, 8000, True),
+    SymbolInfo('XAGUSD', 'Silver / US Dollar', 'Silver/USD', 'commodity', 'SI=F', 'XAG/USD', 23.00, 0.012, 79.0, 10, 8000, False),
+    SymbolInfo('CRUDE', 'Crude Oil', 'Crude Oil', 'commodity', 'CL=F', 'BRENT', 75.50, 0.015, 77.0, 10, 8000, True),
+    SymbolInfo('WTI', 'WTI Crude Oil', 'WTI Crude', 'commodity', None, 'WTI', 72.00, 0.015, None, 10, 8000, False),
+    SymbolInfo('NGAS', 'Natural Gas', 'Natural Gas', 'commodity', 'NG=F', 'NG', 2.80, 0.02, 76.0, 10, 8000, False),
+)
+
+ASSET_CLASSES = ('forex', 'crypto', 'index', 'commodity')
+
+SYMBOLS = MappingProxyType({info.symbol: info for info in _RECORDS})
+
+SYMBOLS_BY_CLASS = MappingProxyType({
+    asset_class: tuple(info.symbol for info in _RECORDS if info.asset_class == asset_class)
+    for asset_class in ASSET_CLASSES
+})
+
+# Provider ticker tables
+YAHOO_TICKERS = MappingProxyType({info.symbol: info.yahoo for info in _RECORDS if info.yahoo})
+TWELVE_DATA_TICKERS = MappingProxyType({info.symbol: info.twelve_data for info in _RECORDS if info.twelve_data})
+
+# Symbols quoted by RealMarketData (those with a Yahoo Finance fallback)
+QUOTED_SYMBOLS = tuple(symbol for asset_class in ASSET_CLASSES
+                       for symbol in SYMBOLS_BY_CLASS[asset_class] if symbol in YAHOO_TICKERS)
+
+# Tradable symbols and their base payouts
+BASE_PAYOUTS = MappingProxyType({symbol: SYMBOLS[symbol].payout_base
+                                 for symbol in QUOTED_SYMBOLS if SYMBOLS[symbol].payout_base is not None})
+
+LISTED_SYMBOLS = tuple(info.symbol for info in _RECORDS if info.listed)
+
+def get_symbol(symbol):
+    """SymbolInfo for symbol, or None if unknown"""
+    return SYMBOLS.get(symbol)
+
+def get_asset_class(symbol):
+    info = SYMBOLS.get(symbol)
+    return info.asset_class if info else 'default'
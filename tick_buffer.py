@@ -0,0 +1,133 @@
+"""
+In-memory tick history for TradePro
+Fixed-capacity ring buffers of (timestamp, price) per symbol, backed by
+NumPy arrays so no Python object is kept per tick.
+"""
+
+import os
+
+import numpy as np
+
+class TickRingBuffer:
+    """Fixed-capacity ring of ascending (timestamp, price) ticks.
+    
+    Every tick is written twice, at slot i and i + capacity, so the most
+    recent `capacity` ticks are always one contiguous slice. That makes
+    append O(1), as-of lookup a binary search and window reads zero-copy
+    views. Views are only valid until the buffer wraps over them; copy
+    anything kept longer.
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._ts = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._prices = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._next = 0  # slot the next tick goes to
+        self._count = 0
+    
+    def __len__(self):
+        return self._count
+    
+    def append(self, timestamp, price):
+        """Append one tick (timestamps must not go backwards)"""
+        i = self._next
+        self._ts[i] = self._ts[i + self.capacity] = timestamp
+        self._prices[i] = self._prices[i + self.capacity] = price
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+    
+    def extend(self, timestamps, prices):
+        """Append ascending ticks from arrays; only the last `capacity` are kept"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)[-self.capacity:]
+        prices = np.asarray(prices, dtype=np.float64)[-self.capacity:]
+        n = len(timestamps)
+        if n == 0:
+            return
+        
+        slots = (self._next + np.arange(n)) % self.capacity
+        self._ts[slots] = self._ts[slots + self.capacity] = timestamps
+        self._prices[slots] = self._prices[slots + self.capacity] = prices
+        self._next = (self._next + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+    
+    def window(self):
+        """(timestamps, prices) views of every buffered tick, oldest first"""
+        end = self._next + self.capacity if self._count == self.capacity else self._next
+        start = end - self._count
+        return self._ts[start:end], self._prices[start:end]
+    
+    def since(self, start_ts, end_ts=None):
+        """Views of the ticks with start_ts <= timestamp (< end_ts)"""
+        ts, prices = self.window()
+        lo = np.searchsorted(ts, start_ts, side='left')
+        hi = len(ts) if end_ts is None else np.searchsorted(ts, end_ts, side='left')
+        return ts[lo:hi], prices[lo:hi]
+    
+    def last(self, n):
+        """Views of the last n ticks"""
+        ts, prices = self.window()
+        return ts[-n:], prices[-n:]
+    
+    def latest(self):
+        """Most recent (timestamp, price), or None when empty"""
+        if not self._count:
+            return None
+        i = (self._next - 1) % self.capacity
+        return float(self._ts[i]), float(self._prices[i])
+    
+    def price_at(self, timestamp):
+        """Price in effect at `timestamp` (last tick at or before it).
+        
+        Returns None when the buffer is empty or `timestamp` is older than
+        the oldest buffered tick.
+        """
+        ts, prices = self.window()
+        i = np.searchsorted(ts, timestamp, side='right') - 1
+        if i < 0:
+            return None
+        return float(prices[i])
+
+def ticks_to_candles(timestamps, prices, seconds):
+    """Bucket ascending ticks into OHLC candles `seconds` wide.
+    
+    Returns column arrays (bucket_start, open, high, low, close, ticks).
+    """
+    if len(timestamps) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty, empty, empty, np.empty(0, dtype=np.int64)
+    
+    buckets = (timestamps // seconds).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(prices)]))
+    return (buckets[starts] * float(seconds),
+            prices[starts],
+            np.maximum.reduceat(prices, starts),
+            np.minimum.reduceat(prices, starts),
+            prices[ends - 1],
+            ends - starts)
+
+class TickBufferSet:
+    """One TickRingBuffer per symbol, filled a whole tick (all symbols) at a time.
+    
+    Not locked itself: the owner serialises writes against reads.
+    """
+    
+    def __init__(self, symbols, capacity=None):
+        self.capacity = capacity or int(os.environ.get('TICK_BUFFER_CAPACITY', 14400))
+        self.symbols = tuple(symbols)
+        self._buffers = {symbol: TickRingBuffer(self.capacity) for symbol in self.symbols}
+    
+    def get(self, symbol):
+        return self._buffers.get(symbol)
+    
+    def extend(self, timestamps, price_matrix):
+        """Record ticks for every symbol; price_matrix is (ticks, symbols)"""
+        for j, symbol in enumerate(self.symbols):
+            self._buffers[symbol].extend(timestamps, price_matrix[:, j])
+    
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'symbols': len(self.symbols),
+            'ticks': {symbol: len(buffer) for symbol, buffer in self._buffers.items()}
+        }
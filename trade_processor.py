@@ -1,103 +1,42 @@
 """
 Trade processing and management system for TradePro
 Handles automatic trade closure and profit/loss calculations
+
+Run as a script to settle what is due once, or with --workers K to start a
+settlement daemon of K processes. Each process owns the users whose id
+modulo K is its index, so their wallet updates never contend with each
+other, and each periodically reports its backlog of overdue trades.
 """
 
+import argparse
+import multiprocessing
+import os
+import signal
+import time
 from datetime import datetime
-from app import app, db
-from models import Trade, User, Wallet, Transaction
+from app import app
+from models import Trade
 from market_data import market_data
+from settlement import settle_due_trades, due_backlog
+
+def process_expired_trades(partition=None, limit=None):
+    """Process expired trades and update user balances.
 
-def process_expired_trades():
-    """Process all expired trades and update user balances"""
+    partition=(index, count) restricts the run to one worker's share of the
+    users; limit caps how many trades are settled in this call.
+    """
+    with app.app_context():
+        settled = settle_due_trades(limit=limit, partition=partition)
+        if settled:
+            print(f"Processed {settled} expired trades")
+        return settled
+
+def expired_backlog(partition=None):
+    """(overdue active trades, seconds the oldest of them is overdue)"""
     with app.app_context():
-        # Get all active trades that have expired
         now = datetime.utcnow()
-        expired_trades = Trade.query.filter(
-            Trade.status == 'active'
-        ).filter(
-            Trade.expiry_time <= now
-        ).all()
-        
-        for trade in expired_trades:
-            try:
-                # Get user and check trade control settings
-                user = User.query.get(trade.user_id)
-                trade_control = user.trade_control if user else 'normal'
-                
-                print(f"Processing trade {trade.id} for user {user.username if user else 'Unknown'}")
-                print(f"User trade control setting: {trade_control}")
-                
-                # Use simulated market price instead of real data
-                from utils import generate_market_price
-                current_price = generate_market_price(trade.asset, trade.entry_price)
-                
-                # Apply admin trade control overrides
-                if trade_control == 'always_lose':
-                    # Force trade to lose - ignore market data
-                    print(f"FORCING TRADE {trade.id} TO LOSE (admin control)")
-                    trade.status = 'lose'
-                    trade.exit_price = trade.entry_price  # Use entry price since we ignore market
-                    trade.profit_loss = -trade.amount  # Lose exactly the invested amount
-                elif trade_control == 'always_profit':
-                    # Force trade to win - ignore market data
-                    print(f"FORCING TRADE {trade.id} TO WIN (admin control)")
-                    trade.status = 'profit'
-                    trade.exit_price = trade.entry_price  # Use entry price since we ignore market
-                    trade.profit_loss = trade.amount  # Profit exactly the invested amount
-                else:
-                    # Normal trading - calculate result based on market price
-                    print(f"Processing trade {trade.id} normally")
-                    trade.calculate_result(current_price)
-                
-                print(f"Trade {trade.id} final status: {trade.status}, P/L: {trade.profit_loss}")
-                
-                # Update user wallet based on trade result
-                user = User.query.get(trade.user_id)
-                if user and user.wallet:
-                    wallet = user.wallet
-                    
-                    if trade.status == 'profit':
-                        # Calculate total return (original amount + profit)
-                        profit_amount = trade.amount * (trade.payout_percentage / 100)
-                        total_return = trade.amount + profit_amount
-                        
-                        if trade.is_demo:
-                            wallet.demo_balance += total_return
-                        else:
-                            wallet.balance += total_return
-                        
-                        # Create profit transaction
-                        transaction = Transaction()
-                        transaction.user_id = user.id
-                        transaction.transaction_type = 'trade_profit'
-                        transaction.amount = total_return
-                        transaction.description = f'Profit: {trade.trade_type.upper()} {trade.asset} trade - Won ${profit_amount:.2f}'
-                        db.session.add(transaction)
-                        trade.profit_loss = profit_amount
-                        
-                    elif trade.status == 'lose':
-                        # For losing trades, the amount was already deducted when trade was placed
-                        # Just record the loss transaction
-                        transaction = Transaction()
-                        transaction.user_id = user.id
-                        transaction.transaction_type = 'trade_loss'
-                        transaction.amount = -trade.amount
-                        transaction.description = f'Loss: {trade.trade_type.upper()} {trade.asset} trade - Lost ${trade.amount:.2f}'
-                        db.session.add(transaction)
-                        trade.profit_loss = -trade.amount
-                
-                trade.closed_at = now
-                
-                print(f"Processed trade {trade.id}: {trade.status} - P/L: ${trade.profit_loss:.2f}")
-                
-            except Exception as e:
-                print(f"Error processing trade {trade.id}: {e}")
-                continue
-        
-        if expired_trades:
-            db.session.commit()
-            print(f"Processed {len(expired_trades)} expired trades")
+        count, oldest = due_backlog(now, partition)
+    return count, (now - oldest).total_seconds() if oldest else 0.0
 
 def get_active_trades_with_current_prices():
     """Get all active trades with current market prices"""
@@ -132,6 +71,91 @@ def get_active_trades_with_current_prices():
     
     return trades_data
 
+def run_settlement_worker(index, count, batch_size, poll_interval, report_interval, stop_event):
+    """Settle one partition until stop_event is set, printing its backlog every report_interval seconds"""
+    # Ctrl+C reaches the whole process group; let the supervisor decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    partition = (index, count) if count > 1 else None
+    name = f"Settlement worker {index + 1}/{count}"
+    print(f"{name} started (pid {os.getpid()})", flush=True)
+
+    settled_since = 0
+    last_report = time.monotonic()
+    while not stop_event.is_set():
+        try:
+            settled = process_expired_trades(partition, batch_size)
+        except Exception as e:
+            print(f"{name} failed to settle trades: {e}")
+            settled = 0
+        settled_since += settled
+
+        if time.monotonic() - last_report >= report_interval:
+            try:
+                backlog, overdue = expired_backlog(partition)
+                print(f"{name}: settled {settled_since} in {time.monotonic() - last_report:.0f}s, "
+                      f"backlog {backlog} trades, oldest {overdue:.1f}s overdue", flush=True)
+            except Exception as e:
+                print(f"{name} failed to read its backlog: {e}")
+            settled_since = 0
+            last_report = time.monotonic()
+
+        # A full batch means more are probably waiting, so go straight on
+        if settled < batch_size:
+            stop_event.wait(poll_interval)
+    print(f"{name} stopped", flush=True)
+
+def run_settlement_daemon(workers, batch_size, poll_interval, report_interval):
+    """Start one settlement process per partition and restart any that exit until SIGTERM/SIGINT"""
+    ctx = multiprocessing.get_context('spawn')
+    stop_event = ctx.Event()
+    stopping = []
+
+    # Only flag the request here: setting stop_event inside a signal handler can
+    # deadlock on the lock the interrupted main loop already holds
+    def request_stop(signum, frame):
+        stopping.append(signum)
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    def start(index):
+        process = ctx.Process(
+            target=run_settlement_worker,
+            args=(index, workers, batch_size, poll_interval, report_interval, stop_event),
+            name=f'settlement-{index + 1}'
+        )
+        process.start()
+        return process
+
+    print(f"Starting settlement daemon with {workers} workers", flush=True)
+    processes = [start(i) for i in range(workers)]
+    while not stopping:
+        time.sleep(1.0)
+        for i, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                print(f"Settlement worker {i + 1}/{workers} exited with code {process.exitcode}, restarting",
+                      flush=True)
+                processes[i] = start(i)
+
+    stop_event.set()
+    for process in processes:
+        process.join(timeout=30)
+        if process.is_alive():
+            process.terminate()
+    print("Settlement daemon stopped")
+
 if __name__ == '__main__':
-    # Can be run as a standalone script for testing
-    process_expired_trades()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Settle expired trades once, or continuously with --workers')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SETTLEMENT_WORKERS', 0)),
+                        help='run as a daemon with this many partitioned processes')
+    parser.add_argument('--batch-size', type=int, default=int(os.environ.get('SETTLEMENT_BATCH_SIZE', 500)))
+    parser.add_argument('--interval', type=float, default=float(os.environ.get('SETTLEMENT_POLL_INTERVAL', 0.5)),
+                        help='seconds to wait when a worker has caught up')
+    parser.add_argument('--report-interval', type=float,
+                        default=float(os.environ.get('SETTLEMENT_REPORT_INTERVAL', 10)),
+                        help='seconds between backlog reports')
+    args = parser.parse_args()
+
+    if args.workers > 0:
+        run_settlement_daemon(args.workers, args.batch_size, args.interval, args.report_interval)
+    else:
+        process_expired_trades()
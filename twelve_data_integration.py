@@ -4,69 +4,102 @@ Provides real-time market data for forex, crypto, stocks, and commodities
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import time
+from candle_store import parse_timestamp
+from symbols import TWELVE_DATA_TICKERS
+from credit_scheduler import (create_scheduler_from_env, CreditBudgetExhausted,
+                              PRIORITY_CHART, PRIORITY_STATUS, PRIORITY_BACKGROUND)
+
+# Start of the 400 message Twelve Data sends when a date range holds no bars yet
+NO_DATA_FOR_DATES = 'no data is available on the specified dates'
+
+class TwelveDataRequestError(Exception):
+    """Transport-level failure talking to Twelve Data (connection, timeout, HTTP error)"""
+    pass
+
+def create_pooled_session(pool_size=10, max_retries=2, backoff_factor=0.3, backoff_jitter=0.2):
+    """Keep-alive session with a bounded connection pool and jittered retry backoff"""
+    retry_options = dict(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        # Rate-limit responses (429) are not retried: retrying only burns more credits
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    try:
+        retry = Retry(backoff_jitter=backoff_jitter, **retry_options)
+    except TypeError:
+        # urllib3 < 2.0 has no backoff_jitter
+        retry = Retry(**retry_options)
+    
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
 
 class TwelveDataAPI:
-    def __init__(self):
+    def __init__(self, base_url=None, session=None, scheduler=None):
         self.api_key = os.environ.get('TWELVE_DATA_API_KEY') or '88e2a5f9f6d84b6a86dd8366660d8247'
-        self.base_url = 'https://api.twelvedata.com'
+        self.base_url = base_url or 'https://api.twelvedata.com'
         
-        # Symbol mappings for different asset types
-        self.symbol_mappings = {
-            'EURUSD': 'EUR/USD',
-            'GBPUSD': 'GBP/USD', 
-            'USDJPY': 'USD/JPY',
-            'USDCAD': 'USD/CAD',
-            'AUDUSD': 'AUD/USD',
-            'NZDUSD': 'NZD/USD',
-            'USDCHF': 'USD/CHF',
-            'EURGBP': 'EUR/GBP',
-            'EURJPY': 'EUR/JPY',
-            'GBPJPY': 'GBP/JPY',
-            
-            'BTCUSD': 'BTC/USD',
-            'ETHUSD': 'ETH/USD',
-            'LTCUSD': 'LTC/USD',
-            'XRPUSD': 'XRP/USD',
-            'ADAUSD': 'ADA/USD',
-            'DOTUSD': 'DOT/USD',
-            'LINKUSD': 'LINK/USD',
-            'BCHUSD': 'BCH/USD',
-            
-            'XAUUSD': 'XAU/USD',  # Gold
-            'XAGUSD': 'XAG/USD',  # Silver
-            'CRUDE': 'BRENT',     # Brent Crude Oil
-            'WTI': 'WTI',         # WTI Crude Oil
-            'NGAS': 'NG',         # Natural Gas
-            
-            'SPX500': 'SPX',
-            'NASDAQ': 'IXIC',
-            'DOW': 'DJI',
-            'FTSE': 'UKX',
-            'DAX': 'DAX',
-            'NIKKEI': 'N225'
-        }
+        # Separate connect and read timeouts (seconds)
+        self.connect_timeout = float(os.environ.get('TWELVE_DATA_CONNECT_TIMEOUT', 3.05))
+        self.read_timeout = float(os.environ.get('TWELVE_DATA_READ_TIMEOUT', 10))
+        self.session = session or create_pooled_session(
+            pool_size=int(os.environ.get('TWELVE_DATA_POOL_SIZE', 10)),
+            max_retries=int(os.environ.get('TWELVE_DATA_MAX_RETRIES', 2)),
+            backoff_factor=float(os.environ.get('TWELVE_DATA_BACKOFF_FACTOR', 0.3)),
+            backoff_jitter=float(os.environ.get('TWELVE_DATA_BACKOFF_JITTER', 0.2))
+        )
+        # Every call spends credits through this scheduler
+        self.scheduler = scheduler or create_scheduler_from_env()
+        
+        # Symbol mappings come from the shared symbol registry
+        self.symbol_mappings = TWELVE_DATA_TICKERS
+    
+    def _get(self, path, params, read_timeout=None, priority=PRIORITY_CHART, cost=1):
+        """GET an endpoint over the pooled session and return the decoded JSON.
+        
+        Raises CreditBudgetExhausted without touching the network when the
+        scheduler cannot grant `cost` credits in time.
+        """
+        self.scheduler.acquire(cost, priority)
+        
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        response = self.session.get(f"{self.base_url}/{path}", params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        # Twelve Data reports rate limiting in the body with HTTP 200
+        if isinstance(data, dict) and data.get('code') == 429:
+            self.scheduler.exhaust_minute()
+        return data
     
-    def get_real_time_price(self, symbol):
+    def get_real_time_price(self, symbol, priority=PRIORITY_CHART):
         """Get real-time price for a symbol"""
         if not self.api_key:
             raise Exception("Twelve Data API key not configured")
         
         mapped_symbol = self.symbol_mappings.get(symbol, symbol)
         
-        url = f"{self.base_url}/price"
         params = {
             'symbol': mapped_symbol,
             'apikey': self.api_key
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get('price', params, priority=priority)
             
             if 'price' in data:
                 return float(data['price'])
@@ -74,65 +107,56 @@ class TwelveDataAPI:
                 raise Exception(f"No price data for {symbol}: {data}")
                 
         except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed for {symbol}: {e}")
+            raise TwelveDataRequestError(f"API request failed for {symbol}: {e}")
     
-    def get_real_time_quote(self, symbol):
+    def get_real_time_quote(self, symbol, priority=PRIORITY_CHART):
         """Get detailed real-time quote with OHLC data"""
         if not self.api_key:
             raise Exception("Twelve Data API key not configured")
         
         mapped_symbol = self.symbol_mappings.get(symbol, symbol)
         
-        url = f"{self.base_url}/quote"
         params = {
             'symbol': mapped_symbol,
             'apikey': self.api_key
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get('quote', params, priority=priority)
             
             if 'symbol' in data:
-                return {
-                    'symbol': symbol,
-                    'price': float(data.get('close', 0)),
-                    'open': float(data.get('open', 0)),
-                    'high': float(data.get('high', 0)),
-                    'low': float(data.get('low', 0)),
-                    'close': float(data.get('close', 0)),
-                    'volume': int(data.get('volume', 0)) if data.get('volume') else 0,
-                    'change': float(data.get('change', 0)),
-                    'change_percent': float(data.get('percent_change', 0)),
-                    'previous_close': float(data.get('previous_close', 0)),
-                    'timestamp': data.get('datetime', datetime.now().isoformat())
-                }
+                return self._parse_quote(symbol, data)
             else:
                 raise Exception(f"No quote data for {symbol}: {data}")
                 
         except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed for {symbol}: {e}")
+            raise TwelveDataRequestError(f"API request failed for {symbol}: {e}")
     
-    def get_time_series(self, symbol, interval='1min', outputsize=100):
-        """Get historical time series data for charts"""
+    def get_time_series(self, symbol, interval='1min', outputsize=100, priority=PRIORITY_CHART, since=None):
+        """Get historical time series data for charts
+        
+        With `since` (epoch seconds, datetime or ISO string) only bars from
+        that time onwards are requested. The bar at `since` itself is included
+        so an updated, still-open last bar comes back too.
+        """
         if not self.api_key:
             raise Exception("Twelve Data API key not configured")
         
         mapped_symbol = self.symbol_mappings.get(symbol, symbol)
         
-        url = f"{self.base_url}/time_series"
         params = {
             'symbol': mapped_symbol,
             'interval': interval,
             'outputsize': outputsize,
+            'timezone': 'UTC',
+            'order': 'ASC',
             'apikey': self.api_key
         }
+        if since is not None:
+            params['start_date'] = datetime.fromtimestamp(parse_timestamp(since), timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
         
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get('time_series', params, read_timeout=15, priority=priority)
             
             if 'values' in data and isinstance(data['values'], list):
                 chart_data = []
@@ -150,16 +174,22 @@ class TwelveDataAPI:
                     except (KeyError, ValueError) as e:
                         continue
                 
-                # Sort by timestamp (oldest first)
-                chart_data.sort(key=lambda x: x['timestamp'])
+                # Requested oldest first; reverse rather than re-sort if the API ignored it
+                if len(chart_data) > 1 and chart_data[0]['timestamp'] > chart_data[-1]['timestamp']:
+                    chart_data.reverse()
                 return chart_data
+            elif (since is not None and data.get('code') == 400
+                  and str(data.get('message', '')).lower().startswith(NO_DATA_FOR_DATES)):
+                # Nothing newer than `since` yet; any other 400 (bad symbol,
+                # interval or date) is an error
+                return []
             else:
                 raise Exception(f"No time series data for {symbol}: {data}")
                 
         except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed for {symbol}: {e}")
+            raise TwelveDataRequestError(f"API request failed for {symbol}: {e}")
     
-    def get_multiple_quotes(self, symbols):
+    def get_multiple_quotes(self, symbols, priority=PRIORITY_BACKGROUND):
         """Get quotes for multiple symbols in one request"""
         if not self.api_key:
             raise Exception("Twelve Data API key not configured")
@@ -168,83 +198,85 @@ class TwelveDataAPI:
         mapped_symbols = [self.symbol_mappings.get(s, s) for s in symbols]
         symbols_string = ','.join(mapped_symbols)
         
-        url = f"{self.base_url}/quote"
         params = {
             'symbol': symbols_string,
             'apikey': self.api_key
         }
         
         try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            # Batch quotes are billed one credit per symbol
+            data = self._get('quote', params, read_timeout=15, priority=priority, cost=len(symbols))
             
             result = {}
             
             # Handle single symbol response
             if isinstance(data, dict) and 'symbol' in data:
                 original_symbol = symbols[0]
-                result[original_symbol] = {
-                    'symbol': original_symbol,
-                    'price': float(data.get('close', 0)),
-                    'change': float(data.get('change', 0)),
-                    'change_percent': float(data.get('percent_change', 0)),
-                    'timestamp': data.get('datetime', datetime.now().isoformat())
-                }
+                result[original_symbol] = self._parse_quote(original_symbol, data)
             
             # Handle multiple symbols response
             elif isinstance(data, dict):
-                for i, (original_symbol, mapped_symbol) in enumerate(zip(symbols, mapped_symbols)):
-                    if mapped_symbol in data:
-                        symbol_data = data[mapped_symbol]
-                        result[original_symbol] = {
-                            'symbol': original_symbol,
-                            'price': float(symbol_data.get('close', 0)),
-                            'change': float(symbol_data.get('change', 0)),
-                            'change_percent': float(symbol_data.get('percent_change', 0)),
-                            'timestamp': symbol_data.get('datetime', datetime.now().isoformat())
-                        }
+                for original_symbol, mapped_symbol in zip(symbols, mapped_symbols):
+                    symbol_data = data.get(mapped_symbol)
+                    # Symbols the upstream could not resolve come back as error objects
+                    if isinstance(symbol_data, dict) and 'symbol' in symbol_data:
+                        try:
+                            result[original_symbol] = self._parse_quote(original_symbol, symbol_data)
+                        except (TypeError, ValueError):
+                            continue
             
             return result
             
         except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed for multiple symbols: {e}")
+            raise TwelveDataRequestError(f"API request failed for multiple symbols: {e}")
+    
+    def _parse_quote(self, symbol, data):
+        """Convert a raw /quote payload into our quote format"""
+        return {
+            'symbol': symbol,
+            'price': float(data.get('close', 0)),
+            'open': float(data.get('open', 0)),
+            'high': float(data.get('high', 0)),
+            'low': float(data.get('low', 0)),
+            'close': float(data.get('close', 0)),
+            'volume': int(data.get('volume', 0)) if data.get('volume') else 0,
+            'change': float(data.get('change', 0)),
+            'change_percent': float(data.get('percent_change', 0)),
+            'previous_close': float(data.get('previous_close', 0)),
+            'timestamp': data.get('datetime', datetime.now().isoformat())
+        }
     
     def get_market_movers(self, market='forex'):
         """Get market movers for a specific market"""
         if not self.api_key:
             raise Exception("Twelve Data API key not configured")
         
-        url = f"{self.base_url}/market_movers/{market}"
         params = {
             'apikey': self.api_key
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(f"market_movers/{market}", params, priority=PRIORITY_STATUS)
             
             return data
             
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Market movers request failed: {e}")
+            raise TwelveDataRequestError(f"Market movers request failed: {e}")
     
     def check_api_usage(self):
         """Check API usage statistics"""
         if not self.api_key:
             return {'error': 'API key not configured'}
         
-        url = f"{self.base_url}/api_usage"
         params = {
             'apikey': self.api_key
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get('api_usage', params, priority=PRIORITY_STATUS)
             
+        except CreditBudgetExhausted as e:
+            return {'error': f"Usage check skipped: {e}"}
         except requests.exceptions.RequestException as e:
             return {'error': f"Usage check failed: {e}"}
     
@@ -252,7 +284,7 @@ class TwelveDataAPI:
         """Test if API is working with a simple request"""
         try:
             # Test with EUR/USD which should always be available
-            price = self.get_real_time_price('EURUSD')
+            price = self.get_real_time_price('EURUSD', priority=PRIORITY_STATUS)
             return price is not None and price > 0
         except:
             return False
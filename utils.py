@@ -1,38 +1,27 @@
 import random
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timezone
+from types import MappingProxyType
+from symbols import get_symbol, LISTED_SYMBOLS
+from price_simulator import price_simulator
 
 def generate_market_price(symbol, base_price=None):
-    """Generate realistic market prices for different assets"""
+    """Generate realistic market prices for different assets
     
-    # Base prices for different assets
-    base_prices = {
-        'EURUSD': 1.0850,
-        'GBPUSD': 1.2650,
-        'USDJPY': 149.50,
-        'BTCUSD': 45000.00,
-        'ETHUSD': 2800.00,
-        'XAUUSD': 2050.00,
-        'CRUDE': 75.50
-    }
+    Registry symbols read the current tick of the shared simulated price
+    path, so every caller sees the same price at the same moment.
+    """
+    info = get_symbol(symbol)
     
     if base_price is None:
-        base_price = base_prices.get(symbol, 100.00)
+        if info:
+            return round(price_simulator.price(symbol), 5)
+        base_price = 100.00
     
     # Add realistic volatility
-    volatility = {
-        'EURUSD': 0.001,
-        'GBPUSD': 0.0015,
-        'USDJPY': 0.002,
-        'BTCUSD': 0.02,
-        'ETHUSD': 0.025,
-        'XAUUSD': 0.01,
-        'CRUDE': 0.015
-    }
-    
-    vol = volatility.get(symbol, 0.01)
+    vol = info.volatility if info else 0.01
     change = random.uniform(-vol, vol)
-    new_price = base_price * (1 + change)
+    new_price = float(base_price) * (1 + change)
     
     return round(new_price, 5)
 
@@ -40,6 +29,17 @@ def get_asset_price(symbol):
     """Get current asset price (simulated)"""
     return generate_market_price(symbol)
 
+def get_asset_price_at(symbol, when):
+    """Simulated price in effect at `when` (naive UTC datetime).
+    
+    Falls back to the current price when `when` is outside the buffered
+    tick history.
+    """
+    price = price_simulator.price_at(symbol, when.replace(tzinfo=timezone.utc).timestamp())
+    if price is None:
+        return generate_market_price(symbol)
+    return round(price, 5)
+
 def format_currency(amount):
     """Format amount as currency"""
     return f"${amount:,.2f}"
@@ -63,63 +63,19 @@ def get_trading_hours():
     else:
         return False, "Markets closed"
 
+# Built once from the symbol registry
+_ASSET_LIST = tuple(
+    MappingProxyType({
+        'symbol': info.symbol,
+        'name': info.name,
+        'type': info.asset_class,
+        'payout': info.payout_base,
+        'min_trade': info.min_trade,
+        'max_trade': info.max_trade
+    })
+    for info in (get_symbol(symbol) for symbol in LISTED_SYMBOLS)
+)
+
 def generate_asset_list():
     """Generate list of available trading assets"""
-    return [
-        {
-            'symbol': 'EURUSD',
-            'name': 'Euro / US Dollar',
-            'type': 'forex',
-            'payout': 85,
-            'min_trade': 1,
-            'max_trade': 5000
-        },
-        {
-            'symbol': 'GBPUSD',
-            'name': 'British Pound / US Dollar',
-            'type': 'forex',
-            'payout': 85,
-            'min_trade': 1,
-            'max_trade': 5000
-        },
-        {
-            'symbol': 'USDJPY',
-            'name': 'US Dollar / Japanese Yen',
-            'type': 'forex',
-            'payout': 83,
-            'min_trade': 1,
-            'max_trade': 5000
-        },
-        {
-            'symbol': 'BTCUSD',
-            'name': 'Bitcoin / US Dollar',
-            'type': 'crypto',
-            'payout': 90,
-            'min_trade': 5,
-            'max_trade': 10000
-        },
-        {
-            'symbol': 'ETHUSD',
-            'name': 'Ethereum / US Dollar',
-            'type': 'crypto',
-            'payout': 88,
-            'min_trade': 5,
-            'max_trade': 10000
-        },
-        {
-            'symbol': 'XAUUSD',
-            'name': 'Gold / US Dollar',
-            'type': 'commodity',
-            'payout': 82,
-            'min_trade': 10,
-            'max_trade': 8000
-        },
-        {
-            'symbol': 'CRUDE',
-            'name': 'Crude Oil',
-            'type': 'commodity',
-            'payout': 80,
-            'min_trade': 10,
-            'max_trade': 8000
-        }
-    ]
+    return [dict(asset) for asset in _ASSET_LIST]